@@ -0,0 +1,123 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+"""
+Measure the memory used by the proxies list and the hosts catalog
+
+Usage: python benchmarks/memory_usage.py [PROXIES] [HOSTS]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from vpngate_extractor.host import Host                         # noqa: E402
+from vpngate_extractor.proxy_health import ProxyHealth          # noqa: E402
+from vpngate_extractor.proxy_list import ProxyList              # noqa: E402
+
+
+def get_rss() -> float:
+    """
+    Get the peak resident set size
+
+    :return: peak RSS in MB
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(description: str,
+            function: 'typing.Callable') -> object:
+    """
+    Measure the memory allocated by a function
+
+    :param description: description to print
+    :param function: function to execute
+    :return: the object returned by the function
+    """
+    tracemalloc.start()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{DESCRIPTION}: {CURRENT:.1f} MB kept, {PEAK:.1f} MB peak, '
+          '{RSS:.1f} MB RSS'.format(DESCRIPTION=description,
+                                    CURRENT=current / 1024 / 1024,
+                                    PEAK=peak / 1024 / 1024,
+                                    RSS=get_rss()))
+    return result
+
+
+def record_results(proxy_health: ProxyHealth,
+                   count: int) -> None:
+    """
+    Record a result for every proxy, one every three proxies fails
+
+    :param proxy_health: ProxyHealth object where to record the results
+    :param count: number of the proxies
+    """
+    for index in range(count):
+        if index % 3:
+            proxy_health.record_success(index)
+        else:
+            proxy_health.record_failure(index)
+
+
+if __name__ == '__main__':
+    proxies_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    hosts_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv') as proxy_file:
+        for index in range(proxies_count):
+            if index % 10:
+                proxy_file.write('10.{A}.{B}.{C}:{PORT}\n'.format(
+                    A=index >> 16 & 255,
+                    B=index >> 8 & 255,
+                    C=index & 255,
+                    PORT=1024 + index % 60000))
+            else:
+                proxy_file.write('[2001:db8::{A:x}]:8080\n'.format(
+                    A=index & 0xffff))
+        proxy_file.flush()
+        proxy_list = measure(
+            '{COUNT} proxies'.format(COUNT=proxies_count),
+            lambda: ProxyList.load(proxy_file.name))
+    proxy_health = ProxyHealth(failures_limit=3)
+    measure('{COUNT} proxies order'.format(COUNT=proxies_count),
+            lambda: proxy_health.sort(proxy_list))
+    measure('{COUNT} proxies results'.format(COUNT=proxies_count),
+            lambda: record_results(proxy_health, proxies_count))
+    measure('{COUNT} proxies order after results'.format(
+                COUNT=proxies_count),
+            lambda: proxy_health.sort(proxy_list))
+    measure('{COUNT} hosts'.format(COUNT=hosts_count),
+            lambda: [Host(country='Italy',
+                          hostname='vpn{INDEX}.opengw.net'.format(
+                              INDEX=index),
+                          config_url='https://www.vpngate.net/en/'
+                                     'do_openvpn.aspx?fqdn=vpn{INDEX}.'
+                                     'opengw.net&ip=10.0.{A}.{B}'
+                                     '&tcp=443&udp=1195'.format(
+                                         INDEX=index,
+                                         A=index >> 8 & 255,
+                                         B=index & 255))
+                     for index in range(hosts_count)])
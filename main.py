@@ -18,68 +18,47 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 ##
 
-import asyncio
-import os
 import timeit
 
+from vpngate_extractor.config import Config
 from vpngate_extractor.current_time import get_current_time
-from vpngate_extractor.consumer_request import ConsumerRequest
-from vpngate_extractor.producer_proxy import ProducerProxy
 from vpngate_extractor.settings import Settings
 
 
-async def worker(proxies_queue: asyncio.Queue,
-                 profiles_list: list,
-                 runner: int) -> None:
+async def main(config: Config,
+               new_profiles: set,
+               watchdog: 'LoopWatchdog' = None,
+               profiler: 'SamplingProfiler' = None) -> None:
     """
-    Worker to process any request from the queue
+    Main function for application starting
 
-    :param proxies_queue: queue to work with the runners
-    :param profiles_list: list of the downloaded profiles
-    :param runner: index of the current runner
+    :param config: options to use for the scan
+    :param new_profiles: set where to add the new profiles
+    :param watchdog: event loop watchdog to run during the scan
+    :param profiler: sampling profiler to run during the scan
     """
-    consumer_request = ConsumerRequest(profiles_list)
-    # This is used to start the loop only
-    proxy_item = True
-    # Cycle while there's a proxy from the queue
-    while proxy_item:
-        proxy_item = await proxies_queue.get()
-        if proxy_item:
-            # Extract data using the current proxy
-            proxy_index, proxies_totals, proxy = proxy_item
-            await consumer_request.execute(proxy_index=proxy_index,
-                                           proxies_totals=proxies_totals,
-                                           proxy=proxy,
-                                           runner=runner)
-            proxies_queue.task_done()
-        else:
-            # A couple of None follows at the end of the Queue
-            # in order to break the cycle
-            proxies_queue.task_done()
-            await proxies_queue.join()
-
+    from vpngate_extractor.consumer_request import RESULT_PROFILE
+    from vpngate_extractor.extractor import scan
 
-async def main(profiles_list: list) -> None:
-    """
-    Main function for application starting
-    """
-    settings = Settings.Instance()
-    proxies_queue = asyncio.Queue()
-    # Add proxies list
-    producer_proxy = ProducerProxy(proxies_queue)
-    await producer_proxy.execute()
-    # List of running worker tasks
-    tasks = []
-    for runner in range(1, settings.runners + 1):
-        # For each runner add an empty value to feed it with at the end
-        await proxies_queue.put(None)
-        tasks.append(worker(proxies_queue, profiles_list, runner))
-    await asyncio.wait(tasks)
+    if profiler:
+        profiler.start()
+    if watchdog:
+        watchdog.start()
+    try:
+        async for result_type, value in scan(config):
+            if result_type == RESULT_PROFILE:
+                new_profiles.add(value)
+    finally:
+        if watchdog:
+            watchdog.stop()
+        if profiler:
+            profiler.stop()
 
 
 # Main activity
 if __name__ == '__main__':
     settings = Settings.Instance()
+    settings.load()
     if settings.verbose_level >= 5:
         print('The following settings are used:')
         print('  > Verbose level: {VALUE}'.format(
@@ -87,27 +66,86 @@ if __name__ == '__main__':
         print('  > URL: {VALUE}'.format(VALUE=settings.url))
         print('  > Destination path: {VALUE}'.format(
             VALUE=settings.destination_path))
+        print('  > Output format: {VALUE}'.format(
+            VALUE=settings.output_format))
         print('  > Proxy list: {VALUE}'.format(VALUE=settings.proxies))
+        print('  > Saved index pages: {VALUE}'.format(
+            VALUE=settings.from_html))
         print('  > Country: {VALUE}'.format(VALUE=settings.country))
         print('  > Timeout: {VALUE}'.format(VALUE=settings.timeout))
         print('  > Mode: {VALUE}'.format(VALUE=settings.mode))
+        print('  > Minimum speed: {VALUE}'.format(VALUE=settings.min_speed))
+        print('  > Maximum ping: {VALUE}'.format(VALUE=settings.max_ping))
+        print('  > Minimum score: {VALUE}'.format(VALUE=settings.min_score))
+        print('  > Top hosts: {VALUE}'.format(VALUE=settings.top))
+        print('  > Consolidate: {VALUE}'.format(VALUE=settings.consolidate))
+        print('  > Probe: {VALUE}'.format(VALUE=settings.probe))
         print('  > Runners: {VALUE}'.format(VALUE=settings.runners))
+        print('  > Runners limits: index {INDEX}, config {CONFIG}, '
+              'profile {PROFILE}'.format(INDEX=settings.index_runners,
+                                         CONFIG=settings.config_runners,
+                                         PROFILE=settings.profile_runners))
         print('  > Delay for proxy: {VALUE}'.format(
             VALUE=settings.delay_for_proxy))
         print('  > Delay for download: {VALUE}'.format(
             VALUE=settings.delay_for_download))
+        print('  > Watchdog: {VALUE}'.format(VALUE=settings.watchdog))
+        print('  > Profile: {VALUE}'.format(VALUE=settings.profile))
+        print('  > Daemon: {VALUE}'.format(VALUE=settings.daemon))
+        if settings.daemon:
+            print('  > Interval: {VALUE}'.format(VALUE=settings.interval))
+            print('  > Jitter: {VALUE}'.format(VALUE=settings.jitter))
+            print('  > Status file: {VALUE}'.format(
+                VALUE=settings.status_file))
+    if settings.dry_run:
+        # Settings were checked, nothing else to do
+        if settings.verbose_level >= 1:
+            print('Dry run completed')
+        raise SystemExit(0)
+    # The event loop is loaded only when the scan is started
+    import asyncio
+
+    watchdog = None
+    if settings.watchdog:
+        from vpngate_extractor.watchdog import LoopWatchdog
+
+        watchdog = LoopWatchdog(
+            threshold=settings.watchdog_threshold / 1000)
+    profiler = None
+    if settings.profile:
+        from vpngate_extractor.profiler import SamplingProfiler
+
+        profiler = SamplingProfiler(
+            interval=settings.profile_interval / 1000)
+    if settings.daemon:
+        from vpngate_extractor.daemon import Daemon
+
+        daemon = Daemon(config=settings.get_config(),
+                        interval=settings.interval,
+                        jitter=settings.jitter,
+                        status_file=settings.status_file,
+                        proxy_failures=settings.proxy_failures,
+                        watchdog=watchdog)
+        try:
+            asyncio.run(daemon.run())
+        except KeyboardInterrupt:
+            # Intercept manual interruption
+            if settings.verbose_level >= 1:
+                print('Manual interruption')
+        raise SystemExit(0)
     if settings.verbose_level >= 1:
         # Print starting time
         starting_time = timeit.default_timer()
         print('Starting time: {TIME}'.format(
             TIME=get_current_time()
         ))
-    # Load existing profiles list
-    initial_profiles = os.listdir(settings.destination_path)
-    existing_profiles = initial_profiles[:]
     # Start main program
+    new_profiles = set()
     try:
-        asyncio.run(main(existing_profiles))
+        asyncio.run(main(settings.get_config(),
+                         new_profiles,
+                         watchdog,
+                         profiler))
     except KeyboardInterrupt:
         # Intercept manual interruption
         if settings.verbose_level >= 1:
@@ -125,12 +163,21 @@ if __name__ == '__main__':
             MINUTES=elapsed_time // 60,
             SECONDS=elapsed_time % 60
         ))
+    if watchdog:
+        # Print event loop lag
+        watchdog.print_summary()
+    if profiler:
+        # Write profiler results
+        profiler.write_collapsed('{PREFIX}.collapsed'.format(
+            PREFIX=settings.profile))
+        profiler.write_report('{PREFIX}.txt'.format(PREFIX=settings.profile))
+        if settings.verbose_level >= 1:
+            print('Profiler results written to {PREFIX}.collapsed and '
+                  '{PREFIX}.txt'.format(PREFIX=settings.profile))
     # Print differences found
-    if set(existing_profiles).difference(initial_profiles):
+    if new_profiles:
         print('New profiles found:')
         print('\n'.join('  {PROFILE}'.format(PROFILE=profile)
-                        for profile
-                        in set(existing_profiles).difference(initial_profiles)
-                        ))
+                        for profile in sorted(new_profiles)))
     else:
         print('No new profiles found')
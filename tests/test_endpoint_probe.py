@@ -0,0 +1,127 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+import asyncio
+import os.path
+import socket
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from vpngate_extractor.endpoint_probe import (                   # noqa: E402
+    EndpointProber,
+    P_CONTROL_HARD_RESET_CLIENT_V2,
+    P_CONTROL_HARD_RESET_SERVER_V2)
+
+
+class ResetResponder(asyncio.DatagramProtocol):
+    def __init__(self,
+                 opcode: int,
+                 delay: float = 0) -> None:
+        """
+        ResetResponder object to reply to the OpenVPN client hard reset
+
+        :param opcode: opcode of the reply
+        :param delay: seconds to wait before the reply
+        """
+        self.opcode = opcode
+        self.delay = delay
+        self.transport = None
+
+    def connection_made(self,
+                        transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self,
+                          data: bytes,
+                          address: tuple) -> None:
+        if data[0] >> 3 == P_CONTROL_HARD_RESET_CLIENT_V2:
+            asyncio.get_running_loop().call_later(
+                self.delay,
+                self.transport.sendto,
+                bytes([self.opcode << 3]) + data[1:],
+                address)
+
+
+def get_closed_port(kind: int) -> int:
+    """
+    Get a local port with nothing listening on it
+
+    :param kind: socket type, SOCK_STREAM or SOCK_DGRAM
+    :return: port number
+    """
+    with socket.socket(socket.AF_INET, kind) as closed_socket:
+        closed_socket.bind(('127.0.0.1', 0))
+        return closed_socket.getsockname()[1]
+
+
+class EndpointProberTest(unittest.IsolatedAsyncioTestCase):
+    async def start_udp(self,
+                        opcode: int,
+                        delay: float = 0) -> int:
+        """
+        Start a local UDP responder
+
+        :param opcode: opcode of the reply
+        :param delay: seconds to wait before the reply
+        :return: port number
+        """
+        loop = asyncio.get_running_loop()
+        (transport, _) = await loop.create_datagram_endpoint(
+            lambda: ResetResponder(opcode, delay),
+            local_addr=('127.0.0.1', 0))
+        self.addCleanup(transport.close)
+        return transport.get_extra_info('sockname')[1]
+
+    async def test_rank(self) -> None:
+        server = await asyncio.start_server(
+            lambda reader, writer: writer.close(), '127.0.0.1', 0)
+        self.addAsyncCleanup(server.wait_closed)
+        self.addCleanup(server.close)
+        tcp_port = server.sockets[0].getsockname()[1]
+        udp_fast_port = await self.start_udp(P_CONTROL_HARD_RESET_SERVER_V2)
+        udp_slow_port = await self.start_udp(P_CONTROL_HARD_RESET_SERVER_V2,
+                                             delay=0.2)
+        udp_wrong_port = await self.start_udp(P_CONTROL_HARD_RESET_CLIENT_V2)
+        endpoints = [
+            ('udp', '127.0.0.1', udp_slow_port, 'udp slow'),
+            ('tcp', '127.0.0.1', get_closed_port(socket.SOCK_STREAM),
+             'tcp closed'),
+            ('udp', '127.0.0.1', udp_wrong_port, 'udp wrong reply'),
+            ('udp', '127.0.0.1', get_closed_port(socket.SOCK_DGRAM),
+             'udp closed'),
+            ('udp', '127.0.0.1', udp_fast_port, 'udp fast'),
+            ('tcp', '127.0.0.1', tcp_port, 'tcp'),
+        ]
+        ranking = await EndpointProber(timeout=1,
+                                       concurrency=2).rank(endpoints)
+        names = [endpoint[3] for (latency, endpoint) in ranking]
+        # The unreachable endpoints are excluded
+        self.assertCountEqual(names, ['tcp', 'udp fast', 'udp slow'])
+        # The fastest endpoints come first
+        self.assertEqual(names[-1], 'udp slow')
+        latencies = [latency for (latency, endpoint) in ranking]
+        self.assertEqual(latencies, sorted(latencies))
+        self.assertGreaterEqual(latencies[-1], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+from . import constants
+
+
+class Config(object):
+    def __init__(self,
+                 *,
+                 url: str = constants.PAGE_URL,
+                 proxies: str = constants.PROXY_LIST_FILENAME,
+                 country: str = constants.REQUESTED_COUNTRY,
+                 destination_path: str = (
+                     constants.DESTINATION_OVPN_PROFILES_FOLDER),
+                 output_format: str = constants.OUTPUT_DIRECTORY,
+                 mode: str = constants.MODE_GENERATE_PROFILES,
+                 openvpn_template: str = constants.OVPN_TEMPLATE,
+                 min_speed: float = 0,
+                 max_ping: int = 0,
+                 min_score: int = 0,
+                 top: int = 0,
+                 consolidate: str = None,
+                 remotes_per_profile: int = 0,
+                 server_poll_timeout: int = constants.SERVER_POLL_TIMEOUT,
+                 probe: bool = False,
+                 probe_timeout: float = constants.PROBE_TIMEOUT,
+                 probe_concurrency: int = constants.PROBE_CONCURRENCY,
+                 probe_top: int = 0,
+                 from_html: list = None,
+                 workers: int = None,
+                 verbose_level: int = 0,
+                 runners: int = constants.RUNNING_TASKS,
+                 index_runners: int = 0,
+                 config_runners: int = 0,
+                 profile_runners: int = 0,
+                 timeout: int = constants.CONNECTION_TIMEOUT,
+                 delay_for_proxy: int = constants.DELAY_FOR_EACH_PROXY,
+                 delay_for_download: int = (
+                     constants.DELAY_FOR_EACH_DOWNLOAD)) -> None:
+        """
+        Config object with the options for a single scan, independent
+        from the command line arguments
+
+        :param url: URL for vpngate list
+        :param proxies: path of the proxies list file
+        :param country: country to look for extraction
+        :param destination_path: directory or file where to store the
+                                 results
+        :param output_format: format used to store the results
+        :param mode: operational mode, either download or generate
+        :param openvpn_template: template filename for generation mode
+        :param min_speed: minimum line speed in Mbps, 0 for any speed
+        :param max_ping: maximum ping time in milliseconds, 0 for any ping
+        :param min_score: minimum quality score, 0 for any score
+        :param top: number of the hosts with the best score to keep, 0 to
+                    keep any host
+        :param consolidate: host type (fqdn or ip) used to generate a single
+                            profile with many remotes for each country and
+                            protocol, None to generate a profile for each
+                            host
+        :param remotes_per_profile: maximum number of remotes for each
+                                    consolidated profile, 0 for no limit
+        :param server_poll_timeout: seconds to wait for each remote in the
+                                    consolidated profiles
+        :param probe: probe the endpoints of the hosts found and generate
+                      the profiles only for the reachable endpoints, sorted
+                      by latency
+        :param probe_timeout: seconds to wait for each endpoint
+        :param probe_concurrency: maximum number of endpoints probed at once
+        :param probe_top: number of the fastest endpoints to keep, 0 to keep
+                          every reachable endpoint
+        :param from_html: list of files, directories or tar archives with
+                          saved index pages to use instead of downloading
+                          the index page, None to download it
+        :param workers: number of processes to parse the saved index
+                        pages, None for the CPUs count
+        :param verbose_level: verbose level for messages, 0 for none
+        :param runners: running tasks in parallel
+        :param index_runners: maximum runners downloading the index page at
+                              the same time, 0 for no limit
+        :param config_runners: maximum runners downloading configuration
+                               pages at the same time, 0 for no limit
+        :param profile_runners: maximum runners downloading profiles at
+                                the same time, 0 for no limit
+        :param timeout: timeout in seconds for each connection
+        :param delay_for_proxy: delay in seconds for each proxy
+        :param delay_for_download: delay in seconds for each download
+        """
+        self.url = url
+        self.proxies = proxies
+        self.country = country
+        self.destination_path = destination_path
+        self.output_format = output_format
+        self.mode = mode
+        self.openvpn_template = openvpn_template
+        self.min_speed = min_speed
+        self.max_ping = max_ping
+        self.min_score = min_score
+        self.top = top
+        self.consolidate = consolidate
+        self.remotes_per_profile = remotes_per_profile
+        self.server_poll_timeout = server_poll_timeout
+        self.probe = probe
+        self.probe_timeout = probe_timeout
+        self.probe_concurrency = probe_concurrency
+        self.probe_top = probe_top
+        self.from_html = from_html
+        self.workers = workers
+        self.verbose_level = verbose_level
+        self.runners = runners
+        self.index_runners = index_runners
+        self.config_runners = config_runners
+        self.profile_runners = profile_runners
+        self.timeout = timeout
+        self.delay_for_proxy = delay_for_proxy
+        self.delay_for_download = delay_for_download
+
+    def get_mode_download(self) -> bool:
+        """
+        Check the operational mode, if it's download
+
+        :return: boolean value for download mode
+        """
+        return self.mode == constants.MODE_DOWNLOAD_PROFILES
+
+    def get_mode_generate(self) -> bool:
+        """
+        Check the operational mode, if it's generate
+
+        :return: boolean value for generate mode
+        """
+        return self.mode == constants.MODE_GENERATE_PROFILES
@@ -40,7 +40,33 @@ CONNECTION_TIMEOUT = 30
 # Operational mode
 MODE_DOWNLOAD_PROFILES = 'download'
 MODE_GENERATE_PROFILES = 'generate'
+# Output formats
+OUTPUT_DIRECTORY = 'directory'
+OUTPUT_ZIP = 'zip'
+OUTPUT_TAR = 'tar'
+OUTPUT_SQLITE = 'sqlite'
+# Host types for the generated profiles
+HOST_TYPE_FQDN = 'fqdn'
+HOST_TYPE_IP = 'ip'
+# Seconds to wait for each remote in the consolidated profiles
+SERVER_POLL_TIMEOUT = 10
+# Manifest with the profiles in the destination folder
+MANIFEST_FOLDER = '.vpngate_extractor'
+MANIFEST_FILENAME = 'manifest.json'
+# Endpoints probing
+PROBE_TIMEOUT = 2
+PROBE_CONCURRENCY = 500
+# Event loop watchdog, in milliseconds
+WATCHDOG_THRESHOLD = 100
+# Sampling profiler interval, in milliseconds
+PROFILE_INTERVAL = 5
 # Verbose level for messages
 VERBOSE_LEVEL = 1
 # Running tasks for concurrent processing
 RUNNING_TASKS = 30
+# Seconds between each scan in daemon mode
+DAEMON_INTERVAL = 3600
+# Maximum random seconds added to the interval in daemon mode
+DAEMON_JITTER = 300
+# Consecutive failures after which a proxy is skipped in daemon mode
+DAEMON_PROXY_FAILURES = 3
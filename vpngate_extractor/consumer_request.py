@@ -18,61 +18,118 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 ##
 
-import os.path
-import time
-import urllib
-
-from bs4 import BeautifulSoup
+import asyncio
+import sys
+import urllib.parse
 
+from .config import Config
 from .current_time import get_current_time
+from .host import Host, filter_hosts
+from .index_parser import parse_hosts, parse_profile_links
 from .openvpn_profile import OpenVPNProfile
+from .output_backend import OutputBackend
+from .profile_groups import ProfileGroups
+from .proxy_health import ProxyHealth
 from .proxy_request import ProxyRequest
-from .settings import Settings
 
 
-# Column index where lookup the country
-TABLE_COLUMN_COUNTRY = 0
-# Text for country lookup
-TABLE_COLUMN_COUNTRY_TITLE = 'Country(Physical location)'
-# Column index with server hostname
-TABLE_COLUMN_HOSTNAME = 1
-# Column index where lookup the hyperlink configuration
-TABLE_COLUMN_CONFIG = 6
-# Table hosts ID
-TABLE_HOSTS_ID = 'vg_hosts_table_id'
+# Result types notified during the scan
+RESULT_HOST = 'host'
+RESULT_PROFILE = 'profile'
 
 
 class ConsumerRequest(object):
     def __init__(self,
-                 existing_profiles: list) -> None:
+                 config: Config,
+                 output: OutputBackend,
+                 *,
+                 openvpn_profile: OpenVPNProfile = None,
+                 session: 'aiohttp.ClientSession' = None,
+                 proxy_health: ProxyHealth = None,
+                 profile_groups: ProfileGroups = None,
+                 probe_hosts: dict = None,
+                 downloaded_hosts: set = None,
+                 top_hosts: dict = None,
+                 on_result: 'typing.Callable' = None) -> None:
         """
         ConsumerRequest object to send requests to the server using a
         proxy URL
-        :param existing_profiles: list with the downloaded profiles
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for generation mode
+        :param session: shared HTTP session for the requests
+        :param proxy_health: store to record the proxies results
+        :param profile_groups: collector of the remotes for the
+                               consolidated profiles
+        :param probe_hosts: dictionary where to collect the hosts to probe
+                            before generating their profiles, None to
+                            generate the profiles immediately
+        :param downloaded_hosts: set of the hosts whose profiles were all
+                                 stored, their configuration page is not
+                                 downloaded again
+        :param top_hosts: dictionary where to collect the hosts with their
+                          proxy, the best hosts are processed after the
+                          scan, None to process the hosts immediately
+        :param on_result: function called with the result type and the
+                          value for each host found and profile written
         """
-        self.settings = Settings.Instance()
-        self.openvpn_profile = OpenVPNProfile(self.settings.openvpn_template)
-        self.profiles = existing_profiles
+        self.config = config
+        if openvpn_profile is None and config.get_mode_generate():
+            openvpn_profile = OpenVPNProfile(config.openvpn_template)
+        self.openvpn_profile = openvpn_profile
+        self.output = output
+        self.session = session
+        self.proxy_health = proxy_health
+        self.profile_groups = profile_groups
+        self.probe_hosts = probe_hosts
+        self.downloaded_hosts = downloaded_hosts
+        self.top_hosts = top_hosts
+        self.on_result = on_result
 
-    async def execute(self,
-                      proxy_index: int,
-                      proxies_totals: int,
-                      proxy: str,
-                      runner: int) -> None:
+    def notify(self,
+               result_type: str,
+               value: str) -> None:
+        """
+        Notify a new result to the caller
+        :param result_type: type of the result, RESULT_HOST or RESULT_PROFILE
+        :param value: the host or the profile name
         """
-        Process a request to get the VPN hosts using the specified proxy
+        if self.on_result:
+            self.on_result(result_type, value)
+
+    def get_request(self,
+                    proxy: str) -> ProxyRequest:
+        """
+        Get a new request using the specified proxy
+        :param proxy: URL of the proxy to use
+        :return: ProxyRequest object
+        """
+        request = ProxyRequest(proxy=proxy, session=self.session)
+        request.timeout = self.config.timeout
+        return request
+
+    async def scan_index(self,
+                         proxy_index: int,
+                         proxies_totals: int,
+                         proxy: str,
+                         runner: int,
+                         list_index: int = None) -> list:
+        """
+        Download the index page using the specified proxy and get the VPN
+        hosts, in generation mode the profiles are generated immediately
         :param proxy_index: index in the proxies list
         :param proxies_totals: number of proxies in the list
         :param proxy: URL of the proxy to use
         :param runner: index of the processing runner
-        :return:
+        :param list_index: index of the proxy in the proxies list for the
+                           health records, proxy_index if missing
+        :return: list of Host objects whose configuration must be
+                 downloaded
         """
-        configuration_urls = []
-        request = ProxyRequest(proxy=proxy)
-        request.timeout = self.settings.timeout
+        request = self.get_request(proxy)
         # Download index page using proxy
-        time.sleep(self.settings.delay_for_proxy)
-        if self.settings.verbose_level >= 1:
+        await asyncio.sleep(self.config.delay_for_proxy)
+        if self.config.verbose_level >= 1:
             progress_percent = (proxy_index + 1) / proxies_totals * 100
             print('[{TIME}] #{RUNNER:04d} Connecting using proxy {INDEX} '
                   'of {TOTALS} ({PERCENT:.2f}%): '
@@ -82,155 +139,223 @@ class ConsumerRequest(object):
                                  TOTALS=proxies_totals,
                                  PERCENT=progress_percent,
                                  URL=proxy))
-        page_content = await request.open(url=self.settings.url)
+        page_content = await request.open(url=self.config.url)
+        if self.proxy_health is not None:
+            if list_index is None:
+                list_index = proxy_index
+            if request.exception:
+                self.proxy_health.record_failure(list_index)
+            else:
+                self.proxy_health.record_success(list_index)
         if request.exception:
-            if self.settings.verbose_level >= 4:
+            if self.config.verbose_level >= 4:
                 print('[{TIME}] #{RUNNER:04d} > Unable to connect: '
                       '{ERROR})'.format(TIME=get_current_time(),
                                         RUNNER=runner,
                                         ERROR=request.exception))
-            return
+            return []
         else:
-            if self.settings.verbose_level >= 3:
+            if self.config.verbose_level >= 3:
                 print('[{TIME}] #{RUNNER:04d} > Connection established, '
                       'downloading index'.format(
                             TIME=get_current_time(),
                             RUNNER=runner))
-        # Apply page fixes for broken tables
-        page_content = page_content.replace(
-            "<td class='vg_table_header'><b>Score</b><BR>"
-            "(Quality)</td>\r\n</td>",
-            "<td class='vg_table_header'><b>Score</b><BR>(Quality)</td>")
-        page_content = page_content.replace(
-            "<td class='vg_table_header'><b>Score</b><br/>"
-            "(Quality)</td>\r\n</tr></table></span></p></td>",
-            "<td class='vg_table_header'><b>Score</b><BR>(Quality)</td>")
+        # Find any host with the requested country
+        try:
+            hosts = parse_hosts(page_content=page_content,
+                                url=self.config.url,
+                                country=self.config.country)
+        except Exception as error:
+            # A corrupted page doesn't stop the other runners
+            if self.config.verbose_level >= 2:
+                print('[{TIME}] #{RUNNER:04d} > '
+                      'Unable to parse the index: '
+                      '{ERROR}'.format(TIME=get_current_time(),
+                                       RUNNER=runner,
+                                       ERROR=repr(error)))
+            return []
+        # Skip the hosts not matching the quality filters, the top hosts
+        # are chosen after the scan when collecting them
+        hosts = self.filter_hosts(hosts=hosts,
+                                  runner=runner,
+                                  top=(0 if self.top_hosts is not None
+                                       else None))
+        for host in hosts:
+            self.notify(RESULT_HOST, host.hostname)
+            if self.config.verbose_level >= 2:
+                print('[{TIME}] #{RUNNER:04d} > '
+                      'New host to download: '
+                      '{URL}'.format(TIME=get_current_time(),
+                                     RUNNER=runner,
+                                     URL=host.hostname))
+        if self.top_hosts is not None:
+            # Collect the hosts, they are processed after the scan
+            for host in hosts:
+                self.top_hosts[host.key] = (host, proxy)
+            return []
+        if self.config.get_mode_generate():
+            for host in hosts:
+                self.generate_profiles(host)
+            return []
+        if self.downloaded_hosts:
+            # Skip the hosts already downloaded in the previous scans
+            hosts = [host for host in hosts
+                     if host.key not in self.downloaded_hosts]
+        return hosts
+
+    async def download_config(self,
+                              host: Host,
+                              host_index: int,
+                              hosts_totals: int,
+                              proxy: str,
+                              runner: int) -> list:
+        """
+        Download the configuration page for a host
+        :param host: Host object with the host data
+        :param host_index: index of the host in the index page
+        :param hosts_totals: number of hosts in the index page
+        :param proxy: URL of the proxy to use
+        :param runner: index of the processing runner
+        :return: list of links to the profiles to download
+        """
+        request = self.get_request(proxy)
+        if self.config.verbose_level >= 2:
+            print('[{TIME}] #{RUNNER:04d} > '
+                  'Downloading configuration {INDEX} of {TOTALS} '
+                  'hosts'.format(TIME=get_current_time(),
+                                 RUNNER=runner,
+                                 INDEX=host_index + 1,
+                                 TOTALS=hosts_totals))
+        page_content = await request.open(url=host.config_url,
+                                          retries=3)
+        if request.exception:
+            if self.config.verbose_level >= 2:
+                print('[{TIME}] #{RUNNER:04d} > '
+                      'Unable to download configuration index: '
+                      '{ERROR}'.format(TIME=get_current_time(),
+                                       RUNNER=runner,
+                                       ERROR=request.exception))
+            return []
+        # Parse each configuration page, skipping the stored profiles
+        links = [link
+                 for link in parse_profile_links(page_content)
+                 if not self.output.exists(link.split('/')[-1])]
+        if not links and self.downloaded_hosts is not None:
+            self.downloaded_hosts.add(host.key)
+        return links
+
+    async def download_profile(self,
+                               link: str,
+                               link_index: int,
+                               links_totals: int,
+                               proxy: str,
+                               runner: int) -> None:
+        """
+        Download a profile and save it if it doesn't exist yet
+        :param link: link to the profile
+        :param link_index: index of the link in the configuration page
+        :param links_totals: number of links in the configuration page
+        :param proxy: URL of the proxy to use
+        :param runner: index of the processing runner
+        :return: None
+        """
+        destination_filename = sys.intern(link.split('/')[-1])
+        # Skip the profiles stored by the other runners
+        if self.output.exists(destination_filename):
+            return
+        request = self.get_request(proxy)
+        # Delay before download
+        await asyncio.sleep(self.config.delay_for_download)
+        # Download data
+        full_url = urllib.parse.urljoin(self.config.url, link)
+        if self.config.verbose_level >= 2:
+            print('[{TIME}] #{RUNNER:04d} > '
+                  'Downloading profile {INDEX} of {TOTALS}: '
+                  '{URL}'.format(TIME=get_current_time(),
+                                 RUNNER=runner,
+                                 INDEX=link_index + 1,
+                                 TOTALS=links_totals,
+                                 URL=full_url))
+        page_content = await request.open(url=full_url,
+                                          retries=10)
+        if not request.exception:
+            # Save configuration file, unless stored during the download
+            if not self.output.exists(destination_filename):
+                self.output.write(destination_filename, page_content)
+                self.notify(RESULT_PROFILE, destination_filename)
+        else:
+            # Error during configuration download
+            if self.config.verbose_level >= 2:
+                print('[{TIME}] #{RUNNER:04d} > '
+                      'Unable to download the configuration: '
+                      '{ERROR}'.format(TIME=get_current_time(),
+                                       RUNNER=runner,
+                                       ERROR=request.exception))
 
-        # Find the servers table (which has Country on the first line)
-        bsoup = BeautifulSoup(page_content, 'html.parser')
-        for hosts_table in bsoup.find_all('table', id=TABLE_HOSTS_ID):
-            table_rows = hosts_table.find_all('tr')
-            table_cells = table_rows[0].find_all('td')
-            # Find the cell with the country title
-            cell_country = table_cells[TABLE_COLUMN_COUNTRY].get_text()
-            if cell_country == TABLE_COLUMN_COUNTRY_TITLE:
-                # Process the hosts table
-                for table_row in table_rows:
-                    table_cells = table_row.find_all('td')
-                    # Skip rows with the country title
-                    cell_country = table_cells[TABLE_COLUMN_COUNTRY].get_text()
-                    if cell_country == TABLE_COLUMN_COUNTRY_TITLE:
-                        continue
-                    # Find any host with the requested country
-                    if cell_country == self.settings.country:
-                        if self.settings.verbose_level >= 2:
-                            cell_hostname = (
-                                table_cells[TABLE_COLUMN_HOSTNAME].get_text())
-                            print('[{TIME}] #{RUNNER:04d} > '
-                                  'New host to download: '
-                                  '{URL}'.format(TIME=get_current_time(),
-                                                 RUNNER=runner,
-                                                 URL=cell_hostname))
-                        # Save data
-                        config_links = (
-                            table_cells[TABLE_COLUMN_CONFIG].find_all('a'))
-                        for link in config_links:
-                            configuration_urls.append(
-                                urllib.parse.urljoin(self.settings.url,
-                                                     link.get('href')))
-                    else:
-                        if self.settings.verbose_level >= 4:
-                            cell_country = (
-                               table_cells[TABLE_COLUMN_COUNTRY].get_text())
-                            print('[{TIME}] #{RUNNER:04d} > '
-                                  'Skipping invalid country '
-                                  '{COUNTRY}'.format(TIME=get_current_time(),
-                                                     RUNNER=runner,
-                                                     COUNTRY=cell_country))
-        # Cycle each configuration_url
-        for (url_index, url) in enumerate(configuration_urls):
-            if self.settings.get_mode_download():
-                if self.settings.verbose_level >= 2:
-                    print('[{TIME}] #{RUNNER:04d} > '
-                          'Downloading configuration {INDEX} of {TOTALS} '
-                          'hosts'.format(TIME=get_current_time(),
-                                         RUNNER=runner,
-                                         INDEX=url_index + 1,
-                                         TOTALS=len(configuration_urls)))
-                page_content = request.open(url=url, retries=3)
-                if request.exception:
-                    if self.settings.verbose_level >= 2:
-                        print('[{TIME}] #{RUNNER:04d} > '
-                              'Unable to download configuration index: '
-                              '{ERROR}'.format(TIME=get_current_time(),
-                                               RUNNER=runner,
-                                               ERROR=request.exception))
-                    continue
-                # Parse each configuration page
-                bsoup = BeautifulSoup(page_content, 'html.parser')
-                # Cycle over each link, ending with '.ovpn'
-                profile_number = 0
-                profiles_list = [link
-                                 for link in bsoup.find_all('a')
-                                 if link.get('href').endswith('.ovpn')]
-                for link in profiles_list:
-                    # Delay before download
-                    time.sleep(self.settings.delay_for_download)
-                    # Download data
-                    profile_number += 1
-                    full_url = urllib.parse.urljoin(self.settings.url,
-                                                    link.get('href'))
-                    if self.settings.verbose_level >= 2:
-                        print('[{TIME}] #{RUNNER:04d} > '
-                              'Downloading profile {INDEX} of {TOTALS}: '
-                              '{URL}'.format(TIME=get_current_time(),
-                                             RUNNER=runner,
-                                             INDEX=profile_number,
-                                             TOTALS=len(profiles_list),
-                                             URL=full_url))
-                    page_content = request.open(url=full_url, retries=10)
-                    if not request.exception:
-                        # Save configuration file
-                        destination_filename = link.get('href').split('/')[-1]
-                        # Skip existing profiles
-                        if destination_filename not in self.profiles:
-                            destination_path = os.path.join(
-                                self.settings.destination_path,
-                                destination_filename)
-                            with open(destination_path, 'wb') as profile_file:
-                                profile_file.write(page_content)
-                            self.profiles.append(destination_filename)
-                    else:
-                        # Error during configuration download
-                        if self.settings.verbose_level >= 2:
-                            print('[{TIME}] #{RUNNER:04d} > '
-                                  'Unable to download the configuration: '
-                                  '{ERROR}'.format(TIME=get_current_time(),
-                                                   RUNNER=runner,
-                                                   ERROR=request.exception))
-            if self.settings.get_mode_generate():
-                # Generate OpenVPN profiles
-                parts_url = urllib.parse.urlsplit(url)
-                arguments_dict = {key: value[0]
-                                  for (key, value)
-                                  in urllib.parse.parse_qs(
-                                      parts_url.query).items()}
-                for destination_host_type in ('fqdn', 'ip'):
-                    for port_type in ('tcp', 'udp'):
-                        if arguments_dict[port_type] != '0':
-                            destination_filename = (
-                                'vpngate_{HOST}_{PROTOCOL}_{PORT}.ovpn'.format(
-                                    HOST=arguments_dict[destination_host_type],
-                                    PROTOCOL=port_type,
-                                    PORT=arguments_dict[port_type]))
-                            # Skip existing profiles
-                            if destination_filename not in self.profiles:
-                                destination_path = os.path.join(
-                                    self.settings.destination_path,
-                                    destination_filename)
-                                self.openvpn_profile.create(
-                                    filepath=destination_path,
-                                    protocol=port_type,
-                                    host=arguments_dict[destination_host_type],
-                                    port=arguments_dict[port_type])
-                                self.profiles.append(destination_filename)
+    def filter_hosts(self,
+                     hosts: list,
+                     runner: int = 0,
+                     top: int = None) -> list:
+        """
+        Filter the hosts using the quality filters
+        :param hosts: list of Host objects
+        :param runner: index of the processing runner
+        :param top: number of the best hosts to keep, 0 to keep every
+                    host, None to use the top hosts option
+        :return: list of the matching Host objects
+        """
+        matching_hosts = filter_hosts(hosts,
+                                      min_speed=self.config.min_speed,
+                                      max_ping=self.config.max_ping,
+                                      min_score=self.config.min_score,
+                                      top=(self.config.top if top is None
+                                           else top))
+        if self.config.verbose_level >= 4:
+            for host in set(hosts).difference(matching_hosts):
+                print('[{TIME}] #{RUNNER:04d} > '
+                      'Skipping host {HOST} by quality'.format(
+                            TIME=get_current_time(),
+                            RUNNER=runner,
+                            HOST=host.hostname))
+        return matching_hosts
+
+    def generate_profiles(self,
+                          host: Host,
+                          protocols: tuple = ('tcp', 'udp')) -> None:
+        """
+        Generate the OpenVPN profiles for a host
+        :param host: Host object with the host data
+        :param protocols: protocols for which to generate the profiles
+        :return: None
+        """
+        if self.probe_hosts is not None:
+            # Collect the host, the profiles are generated after probing
+            self.probe_hosts[host.key] = host
+            return
+        if self.config.consolidate:
+            # Collect the remotes for the consolidated profiles
+            for port_type in protocols:
+                if host.get_port(port_type):
+                    self.profile_groups.add(
+                        country=host.country,
+                        protocol=port_type,
+                        host=host.get_address(self.config.consolidate),
+                        port=host.get_port(port_type))
+            return
+        for destination_host_type in ('fqdn', 'ip'):
+            for port_type in protocols:
+                if host.get_port(port_type):
+                    destination_filename = sys.intern(
+                        'vpngate_{HOST}_{PROTOCOL}_{PORT}.ovpn'.format(
+                            HOST=host.get_address(destination_host_type),
+                            PROTOCOL=port_type,
+                            PORT=host.get_port(port_type)))
+                    # Skip existing profiles
+                    if not self.output.exists(destination_filename):
+                        self.output.write(
+                            destination_filename,
+                            self.openvpn_profile.render(
+                                protocol=port_type,
+                                host=host.get_address(destination_host_type),
+                                port=host.get_port(port_type)))
+                        self.notify(RESULT_PROFILE, destination_filename)
@@ -0,0 +1,166 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import json
+import os
+import random
+import time
+
+from .config import Config
+from .consumer_request import RESULT_HOST, RESULT_PROFILE
+from .current_time import get_current_time
+from .extractor import Extractor
+from .proxy_health import ProxyHealth
+from .watchdog import LoopWatchdog
+
+
+class Daemon(object):
+    def __init__(self,
+                 config: Config,
+                 interval: int,
+                 jitter: int = 0,
+                 status_file: str = None,
+                 proxy_failures: int = 0,
+                 watchdog: LoopWatchdog = None) -> None:
+        """
+        Daemon object to rescan the hosts periodically, keeping the proxies
+        health, the HTTP connections and the hosts catalog between the
+        cycles
+
+        :param config: options to use for each scan
+        :param interval: seconds between the start of each scan
+        :param jitter: maximum random seconds added to the interval
+        :param status_file: path of the JSON file with the latest cycle
+                            statistics, no file is written if missing
+        :param proxy_failures: consecutive failures after which a proxy is
+                               skipped for the next cycles, 0 to never skip
+        :param watchdog: event loop watchdog to start, its statistics are
+                         added to the cycle statistics
+        """
+        self.config = config
+        self.interval = interval
+        self.jitter = jitter
+        self.status_file = status_file
+        # Skipped proxies are tried again after a few cycles
+        self.extractor = Extractor(
+            proxy_health=ProxyHealth(failures_limit=proxy_failures,
+                                     retry_time=interval * 6))
+        self.watchdog = watchdog
+        self.cycle = 0
+
+    async def run(self,
+                  cycles: int = 0) -> None:
+        """
+        Run the scan cycles, a failed cycle is reported in the status file
+        and the next cycle is run anyway
+
+        :param cycles: number of cycles to run, 0 to run forever
+        """
+        if self.watchdog:
+            self.watchdog.start()
+        async with self.extractor:
+            while not cycles or self.cycle < cycles:
+                starting_time = time.monotonic()
+                try:
+                    stats = await self.run_cycle()
+                except Exception as error:
+                    # A failed cycle doesn't stop the daemon, the next
+                    # cycle is tried anyway
+                    stats = {'cycle': self.cycle,
+                             'started': time.time() - (time.monotonic() -
+                                                       starting_time),
+                             'elapsed': time.monotonic() - starting_time,
+                             'error': repr(error)}
+                    if self.config.verbose_level >= 1:
+                        print('[{TIME}] Cycle {CYCLE} failed: '
+                              '{ERROR}'.format(TIME=get_current_time(),
+                                               CYCLE=self.cycle,
+                                               ERROR=repr(error)))
+                # The interval is counted from the start of the cycle
+                delay = (max(0.0, self.interval - stats['elapsed']) +
+                         random.uniform(0, self.jitter))
+                stats['next_cycle'] = time.time() + delay
+                if self.watchdog:
+                    stats['watchdog'] = self.watchdog.get_summary()
+                try:
+                    self.write_status(stats)
+                except OSError as error:
+                    if self.config.verbose_level >= 1:
+                        print('[{TIME}] Unable to write the status: '
+                              '{ERROR}'.format(TIME=get_current_time(),
+                                               ERROR=repr(error)))
+                if cycles and self.cycle >= cycles:
+                    break
+                if self.config.verbose_level >= 1:
+                    print('[{TIME}] Cycle {CYCLE} completed in {ELAPSED:.2f} '
+                          'seconds, next cycle in {DELAY:.0f} seconds'.format(
+                                TIME=get_current_time(),
+                                CYCLE=self.cycle,
+                                ELAPSED=stats['elapsed'],
+                                DELAY=delay))
+                await asyncio.sleep(delay)
+        if self.watchdog:
+            self.watchdog.stop()
+
+    async def run_cycle(self) -> dict:
+        """
+        Run a single scan cycle
+
+        :return: dictionary with the cycle statistics
+        """
+        self.cycle += 1
+        starting_time = time.monotonic()
+        known_hosts = len(self.extractor.hosts)
+        hosts = set()
+        new_profiles = []
+        async for result_type, value in self.extractor.scan(self.config):
+            if result_type == RESULT_HOST:
+                hosts.add(value)
+            elif result_type == RESULT_PROFILE:
+                new_profiles.append(value)
+                if self.config.verbose_level >= 1:
+                    print('[{TIME}] New profile found: {PROFILE}'.format(
+                        TIME=get_current_time(),
+                        PROFILE=value))
+        return {'cycle': self.cycle,
+                'started': time.time() - (time.monotonic() - starting_time),
+                'elapsed': time.monotonic() - starting_time,
+                'hosts': len(hosts),
+                'new_hosts': len(self.extractor.hosts) - known_hosts,
+                'known_hosts': len(self.extractor.hosts),
+                'new_profiles': new_profiles,
+                'proxies': self.extractor.proxy_health.get_summary()}
+
+    def write_status(self,
+                     stats: dict) -> None:
+        """
+        Write the cycle statistics to the status file, the file is
+        replaced atomically to never expose a partial status
+
+        :param stats: dictionary with the cycle statistics
+        """
+        if not self.status_file:
+            return
+        temporary_path = '{FILE}.tmp'.format(FILE=self.status_file)
+        with open(temporary_path, 'w') as status_file:
+            json.dump(stats, status_file, indent=2)
+        os.replace(temporary_path, self.status_file)
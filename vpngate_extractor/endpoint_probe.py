@@ -0,0 +1,176 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import os
+import struct
+import time
+
+# OpenVPN opcodes, stored in the high 5 bits of the first byte
+P_CONTROL_HARD_RESET_CLIENT_V2 = 7
+P_CONTROL_HARD_RESET_SERVER_V2 = 8
+
+
+def get_reset_packet() -> bytes:
+    """
+    Get an OpenVPN client hard reset packet, without tls-auth
+
+    :return: packet data
+    """
+    return struct.pack('!B8sBI',
+                       P_CONTROL_HARD_RESET_CLIENT_V2 << 3,
+                       # Random session ID
+                       os.urandom(8),
+                       # Acknowledged packets count
+                       0,
+                       # Packet ID
+                       0)
+
+
+class ResetProtocol(asyncio.DatagramProtocol):
+    def __init__(self,
+                 future: asyncio.Future) -> None:
+        """
+        ResetProtocol object to wait for the OpenVPN server hard reset
+
+        :param future: future set when the server replies
+        """
+        self.future = future
+
+    def connection_made(self,
+                        transport: asyncio.DatagramTransport) -> None:
+        transport.sendto(get_reset_packet())
+
+    def datagram_received(self,
+                          data: bytes,
+                          address: tuple) -> None:
+        if (data and data[0] >> 3 == P_CONTROL_HARD_RESET_SERVER_V2 and
+                not self.future.done()):
+            self.future.set_result(True)
+
+    def error_received(self,
+                       exception: Exception) -> None:
+        # ICMP port unreachable and similar errors
+        if not self.future.done():
+            self.future.set_result(False)
+
+
+async def probe_tcp(host: str,
+                    port: int,
+                    timeout: float) -> float:
+    """
+    Probe a TCP endpoint by connecting to it
+
+    :param host: hostname or IP address
+    :param port: port number
+    :param timeout: seconds to wait for the connection
+    :return: latency in seconds, None for unreachable endpoints
+    """
+    starting_time = time.monotonic()
+    try:
+        (_, writer) = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    latency = time.monotonic() - starting_time
+    writer.close()
+    return latency
+
+
+async def probe_udp(host: str,
+                    port: int,
+                    timeout: float) -> float:
+    """
+    Probe a UDP endpoint by sending an OpenVPN client hard reset and
+    waiting for the server hard reset
+
+    :param host: hostname or IP address
+    :param port: port number
+    :param timeout: seconds to wait for the reply
+    :return: latency in seconds, None for unreachable endpoints
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    starting_time = time.monotonic()
+    try:
+        (transport, _) = await loop.create_datagram_endpoint(
+            lambda: ResetProtocol(future),
+            remote_addr=(host, port))
+    except OSError:
+        return None
+    try:
+        replied = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        replied = False
+    finally:
+        transport.close()
+    return time.monotonic() - starting_time if replied else None
+
+
+class EndpointProber(object):
+    def __init__(self,
+                 timeout: float,
+                 concurrency: int) -> None:
+        """
+        EndpointProber object to probe many endpoints concurrently
+
+        :param timeout: seconds to wait for each endpoint
+        :param concurrency: maximum number of endpoints probed at once
+        """
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+    async def probe(self,
+                    protocol: str,
+                    host: str,
+                    port: int) -> float:
+        """
+        Probe an endpoint
+
+        :param protocol: protocol type, either tcp or udp
+        :param host: hostname or IP address
+        :param port: port number
+        :return: latency in seconds, None for unreachable endpoints
+        """
+        probe_function = probe_tcp if protocol == 'tcp' else probe_udp
+        return await probe_function(host, port, self.timeout)
+
+    async def rank(self,
+                   endpoints: list) -> list:
+        """
+        Probe the endpoints and rank the reachable ones by latency
+
+        :param endpoints: list of (protocol, host, port, ...) tuples, any
+                          extra item is kept in the results
+        :return: list of (latency, endpoint) tuples, the fastest first
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe_endpoint(endpoint: tuple) -> float:
+            async with semaphore:
+                return await self.probe(*endpoint[:3])
+
+        latencies = await asyncio.gather(*(probe_endpoint(endpoint)
+                                           for endpoint in endpoints))
+        return sorted(((latency, endpoint)
+                       for (latency, endpoint) in zip(latencies, endpoints)
+                       if latency is not None),
+                      key=lambda item: item[0])
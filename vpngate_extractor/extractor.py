@@ -0,0 +1,586 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import os.path
+import time
+
+from .config import Config
+from .consumer_request import ConsumerRequest, RESULT_HOST, RESULT_PROFILE
+from .current_time import get_current_time
+from .endpoint_probe import EndpointProber
+from .host import filter_hosts
+from .openvpn_profile import OpenVPNProfile
+from .output_backend import OutputBackend, open_output
+from .producer_proxy import ProducerProxy
+from .profile_groups import ProfileGroups
+from .proxy_health import ProxyHealth
+from .proxy_list import ProxyList
+from .work_scheduler import (WorkScheduler,
+                             LANE_CONFIG, LANE_INDEX, LANE_PROFILE)
+
+
+class Extractor(object):
+    def __init__(self,
+                 proxy_health: ProxyHealth = None) -> None:
+        """
+        Extractor object to run several scans in the same process, sharing
+        the HTTP session, the parsed templates, the proxies lists, the
+        proxies health and the hosts catalog between the scans
+
+        :param proxy_health: store for the proxies results, a new store is
+                             created if missing
+        """
+        self.proxy_health = (proxy_health if proxy_health is not None
+                             else ProxyHealth())
+        # Host -> last time the host was found
+        self.hosts = {}
+        # Hosts whose profiles were all downloaded
+        self.downloaded_hosts = set()
+        self.__session = None
+        # File path -> (modification time, cached object)
+        self.__templates = {}
+        self.__proxy_lists = {}
+        # (Output format, destination path) -> output backend
+        self.__outputs = {}
+
+    async def __aenter__(self) -> 'Extractor':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Close the output backends and the shared HTTP session
+        """
+        for output in self.__outputs.values():
+            output.close()
+        self.__outputs.clear()
+        if self.__session:
+            await self.__session.close()
+            self.__session = None
+
+    def get_session(self) -> 'aiohttp.ClientSession':
+        """
+        Get the shared HTTP session, creating it on the first use
+
+        :return: HTTP session shared between the scans
+        """
+        if self.__session is None:
+            # aiohttp is loaded only when a network request is made
+            import aiohttp
+
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=0))
+        return self.__session
+
+    @staticmethod
+    def __get_cached(cache: dict,
+                     filepath: str,
+                     loader: 'typing.Callable') -> object:
+        """
+        Get an object loaded from a file, reloading it if the file changed
+
+        :param cache: dictionary used to cache the loaded objects
+        :param filepath: path of the file to load
+        :param loader: function to load the object from the file path
+        :return: the cached object
+        """
+        modified_time = os.path.getmtime(filepath)
+        cached = cache.get(filepath)
+        if cached is None or cached[0] != modified_time:
+            cached = (modified_time, loader(filepath))
+            cache[filepath] = cached
+        return cached[1]
+
+    def get_openvpn_profile(self,
+                            template_path: str) -> OpenVPNProfile:
+        """
+        Get the parsed OpenVPN template
+
+        :param template_path: file path for the ovpn template file
+        :return: OpenVPNProfile object for the template
+        """
+        return self.__get_cached(cache=self.__templates,
+                                 filepath=template_path,
+                                 loader=OpenVPNProfile)
+
+    def get_proxy_list(self,
+                       filename: str) -> ProxyList:
+        """
+        Get the proxies list
+
+        :param filename: path of the proxies list file
+        :return: ProxyList object with the proxies
+        """
+        return self.__get_cached(cache=self.__proxy_lists,
+                                 filepath=filename,
+                                 loader=ProxyList.load)
+
+    def get_output(self,
+                   config: Config) -> OutputBackend:
+        """
+        Get the output backend for the destination, the backend is opened
+        only on the first use
+
+        :param config: options with the output format and destination
+        :return: OutputBackend object for the destination
+        """
+        key = (config.output_format, config.destination_path)
+        if key not in self.__outputs:
+            self.__outputs[key] = open_output(config.output_format,
+                                              config.destination_path)
+        return self.__outputs[key]
+
+    async def scan(self,
+                   config: Config) -> 'typing.AsyncIterator[tuple]':
+        """
+        Scan the hosts using every proxy and yield the results as soon
+        as they are found
+
+        :param config: options to use for the scan
+        :return: asynchronous generator of (result type, value) tuples,
+                 with result type either RESULT_HOST or RESULT_PROFILE
+        """
+        output = self.get_output(config)
+        results = asyncio.Queue()
+        task = asyncio.ensure_future(
+            self.__run(config=config,
+                       output=output,
+                       on_result=lambda *result: results.put_nowait(result)))
+        task.add_done_callback(lambda future: results.put_nowait(None))
+        try:
+            result = await results.get()
+            while result is not None:
+                if result[0] == RESULT_HOST:
+                    self.hosts[result[1]] = time.time()
+                yield result
+                result = await results.get()
+            # Raise any exception from the runners
+            await task
+        finally:
+            task.cancel()
+            output.flush()
+
+    async def __run(self,
+                    config: Config,
+                    output: OutputBackend,
+                    on_result: 'typing.Callable') -> None:
+        """
+        Run the runners for a scan
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param on_result: function called for each result
+        """
+        openvpn_profile = (self.get_openvpn_profile(config.openvpn_template)
+                           if config.get_mode_generate() else None)
+        profile_groups = ProfileGroups() if config.consolidate else None
+        probe_hosts = {} if config.probe else None
+        # The top hosts are chosen once for the whole scan, the offline
+        # mode already processes every page at once
+        top_hosts = {} if config.top and not config.from_html else None
+        if config.from_html:
+            await self.__run_offline(config=config,
+                                     output=output,
+                                     openvpn_profile=openvpn_profile,
+                                     profile_groups=profile_groups,
+                                     probe_hosts=probe_hosts,
+                                     on_result=on_result)
+        else:
+            await self.__run_online(config=config,
+                                    output=output,
+                                    openvpn_profile=openvpn_profile,
+                                    profile_groups=profile_groups,
+                                    probe_hosts=probe_hosts,
+                                    top_hosts=top_hosts,
+                                    on_result=on_result)
+        if top_hosts:
+            await self.__process_top_hosts(config=config,
+                                           output=output,
+                                           openvpn_profile=openvpn_profile,
+                                           profile_groups=profile_groups,
+                                           probe_hosts=probe_hosts,
+                                           top_hosts=top_hosts,
+                                           on_result=on_result)
+        if probe_hosts:
+            await self.__probe_hosts(config=config,
+                                     output=output,
+                                     openvpn_profile=openvpn_profile,
+                                     profile_groups=profile_groups,
+                                     probe_hosts=probe_hosts,
+                                     on_result=on_result)
+        if profile_groups:
+            self.__write_consolidated(config=config,
+                                      output=output,
+                                      openvpn_profile=openvpn_profile,
+                                      profile_groups=profile_groups,
+                                      on_result=on_result)
+
+    async def __run_offline(self,
+                            config: Config,
+                            output: OutputBackend,
+                            openvpn_profile: OpenVPNProfile,
+                            profile_groups: ProfileGroups,
+                            probe_hosts: dict,
+                            on_result: 'typing.Callable') -> None:
+        """
+        Generate the profiles from the saved index pages, without any
+        network access
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for the profiles
+        :param profile_groups: collector for the consolidated profiles
+        :param probe_hosts: collector for the hosts to probe
+        :param on_result: function called for each result
+        """
+        # The saved pages are parsed only in offline mode
+        from .html_snapshots import load_hosts
+
+        hosts = await load_hosts(paths=config.from_html,
+                                 url=config.url,
+                                 country=config.country,
+                                 workers=config.workers,
+                                 verbose_level=config.verbose_level)
+        consumer_request = ConsumerRequest(config=config,
+                                           output=output,
+                                           openvpn_profile=openvpn_profile,
+                                           profile_groups=profile_groups,
+                                           probe_hosts=probe_hosts,
+                                           on_result=on_result)
+        for host in consumer_request.filter_hosts(hosts):
+            consumer_request.notify(RESULT_HOST, host.hostname)
+            consumer_request.generate_profiles(host)
+
+    async def __run_online(self,
+                           config: Config,
+                           output: OutputBackend,
+                           openvpn_profile: OpenVPNProfile,
+                           profile_groups: ProfileGroups,
+                           probe_hosts: dict,
+                           on_result: 'typing.Callable',
+                           top_hosts: dict = None,
+                           hosts: list = None) -> None:
+        """
+        Run the runners to scan the hosts using the proxies
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for the profiles
+        :param profile_groups: collector for the consolidated profiles
+        :param probe_hosts: collector for the hosts to probe
+        :param on_result: function called for each result
+        :param top_hosts: collector for the hosts to choose after the scan
+        :param hosts: list of (Host, proxy URL) tuples whose configuration
+                      is downloaded instead of scanning the proxies
+        """
+        # Separated lanes for index pages, configuration pages and profiles
+        # downloads, the downstream work comes first and any runner can
+        # take any work found by the other runners
+        scheduler = WorkScheduler()
+        scheduler.add_lane(name=LANE_PROFILE,
+                           priority=0,
+                           limit=config.profile_runners)
+        scheduler.add_lane(name=LANE_CONFIG,
+                           priority=1,
+                           limit=config.config_runners)
+        # The index lane is bounded, the proxies are added while the
+        # runners work
+        scheduler.add_lane(name=LANE_INDEX,
+                           priority=2,
+                           limit=config.index_runners,
+                           maxsize=config.runners * 2)
+        # List of running worker tasks, named to identify them in reports
+        tasks = []
+        if hosts is None:
+            # Add proxies list, sorted by their health
+            proxy_list = self.get_proxy_list(config.proxies)
+            producer_proxy = ProducerProxy(scheduler.get_lane(LANE_INDEX),
+                                           proxy_list,
+                                           self.proxy_health.sort(proxy_list))
+            tasks.append(asyncio.ensure_future(
+                self.__producer(scheduler, producer_proxy)))
+            tasks[0].set_name('producer')
+        else:
+            # Download the configuration for the hosts already found
+            producer_proxy = None
+            for (host_index, (host, proxy)) in enumerate(hosts):
+                await scheduler.put(LANE_CONFIG,
+                                    (host, host_index, len(hosts), proxy))
+            await scheduler.close()
+        for runner in range(1, config.runners + 1):
+            consumer_request = ConsumerRequest(
+                config=config,
+                output=output,
+                openvpn_profile=openvpn_profile,
+                session=self.get_session(),
+                proxy_health=self.proxy_health,
+                profile_groups=profile_groups,
+                probe_hosts=probe_hosts,
+                downloaded_hosts=self.downloaded_hosts,
+                top_hosts=top_hosts,
+                on_result=on_result)
+            task = asyncio.ensure_future(self.__worker(scheduler,
+                                                       producer_proxy,
+                                                       consumer_request,
+                                                       runner))
+            task.set_name('runner-{RUNNER:04d}'.format(RUNNER=runner))
+            tasks.append(task)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def __process_top_hosts(self,
+                                  config: Config,
+                                  output: OutputBackend,
+                                  openvpn_profile: OpenVPNProfile,
+                                  profile_groups: ProfileGroups,
+                                  probe_hosts: dict,
+                                  top_hosts: dict,
+                                  on_result: 'typing.Callable') -> None:
+        """
+        Choose the top hosts between every host found in the scan and
+        generate or download their profiles
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for the profiles
+        :param profile_groups: collector for the consolidated profiles
+        :param probe_hosts: collector for the hosts to probe
+        :param top_hosts: hosts found with their proxy
+        :param on_result: function called for each result
+        """
+        proxies = {id(host): proxy for (host, proxy) in top_hosts.values()}
+        hosts = filter_hosts([host for (host, proxy) in top_hosts.values()],
+                             top=config.top)
+        if config.verbose_level >= 1:
+            print('[{TIME}] Top hosts: {COUNT} of {TOTALS}'.format(
+                TIME=get_current_time(),
+                COUNT=len(hosts),
+                TOTALS=len(top_hosts)))
+        if config.get_mode_generate():
+            consumer_request = ConsumerRequest(
+                config=config,
+                output=output,
+                openvpn_profile=openvpn_profile,
+                profile_groups=profile_groups,
+                probe_hosts=probe_hosts,
+                on_result=on_result)
+            for host in hosts:
+                consumer_request.generate_profiles(host)
+        else:
+            # Skip the hosts already downloaded in the previous scans
+            await self.__run_online(config=config,
+                                    output=output,
+                                    openvpn_profile=openvpn_profile,
+                                    profile_groups=profile_groups,
+                                    probe_hosts=probe_hosts,
+                                    on_result=on_result,
+                                    hosts=[(host, proxies[id(host)])
+                                           for host in hosts
+                                           if host.key
+                                           not in self.downloaded_hosts])
+
+    async def __probe_hosts(self,
+                            config: Config,
+                            output: OutputBackend,
+                            openvpn_profile: OpenVPNProfile,
+                            profile_groups: ProfileGroups,
+                            probe_hosts: dict,
+                            on_result: 'typing.Callable') -> None:
+        """
+        Probe the endpoints of the hosts found and generate the profiles
+        only for the fastest reachable endpoints
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for the profiles
+        :param profile_groups: collector for the consolidated profiles
+        :param probe_hosts: hosts to probe
+        :param on_result: function called for each result
+        """
+        endpoints = [(protocol, host.ip, host.get_port(protocol), host)
+                     for host in probe_hosts.values()
+                     for protocol in ('tcp', 'udp')
+                     if host.get_port(protocol)]
+        prober = EndpointProber(timeout=config.probe_timeout,
+                                concurrency=config.probe_concurrency)
+        ranking = await prober.rank(endpoints)
+        if config.verbose_level >= 1:
+            print('[{TIME}] Reachable endpoints: {COUNT} of {TOTALS}'.format(
+                TIME=get_current_time(),
+                COUNT=len(ranking),
+                TOTALS=len(endpoints)))
+        if config.probe_top:
+            ranking = ranking[:config.probe_top]
+        consumer_request = ConsumerRequest(config=config,
+                                           output=output,
+                                           openvpn_profile=openvpn_profile,
+                                           profile_groups=profile_groups,
+                                           on_result=on_result)
+        for (latency, (protocol, address, port, host)) in ranking:
+            if config.verbose_level >= 2:
+                print('[{TIME}] > {PROTOCOL} {ADDRESS}:{PORT} '
+                      '{LATENCY:.0f} ms'.format(TIME=get_current_time(),
+                                                PROTOCOL=protocol,
+                                                ADDRESS=address,
+                                                PORT=port,
+                                                LATENCY=latency * 1000))
+            consumer_request.generate_profiles(host, protocols=(protocol, ))
+
+    def __write_consolidated(self,
+                             config: Config,
+                             output: OutputBackend,
+                             openvpn_profile: OpenVPNProfile,
+                             profile_groups: ProfileGroups,
+                             on_result: 'typing.Callable') -> None:
+        """
+        Write the consolidated profiles with the remotes found in the scan,
+        the unchanged profiles are not written again and the profiles of
+        the same groups which are not produced anymore are deleted
+
+        :param config: options to use for the scan
+        :param output: output backend where to store the profiles
+        :param openvpn_profile: parsed template for the profiles
+        :param profile_groups: collected remotes for the profiles
+        :param on_result: function called for each profile written
+        """
+        names = set()
+        for (name, protocol, remotes) in profile_groups.get_profiles(
+                config.remotes_per_profile):
+            names.add(name)
+            content = openvpn_profile.render_remotes(
+                protocol=protocol,
+                remotes=remotes,
+                server_poll_timeout=config.server_poll_timeout)
+            if self.__read_profile(output, name) != content:
+                output.write(name, content)
+                on_result(RESULT_PROFILE, name)
+        # Delete the chunks with stale remotes from the previous scans
+        for name in list(profile_groups.get_group_profiles(output.names)):
+            if name not in names:
+                output.delete(name)
+
+    @staticmethod
+    def __read_profile(output: OutputBackend,
+                       name: str) -> str:
+        """
+        Read a stored profile, a profile missing from the output, even if
+        it's still in the index, is handled as a profile to write again
+
+        :param output: output backend where the profiles are stored
+        :param name: profile name
+        :return: profile text, None for missing profiles
+        """
+        if not output.exists(name):
+            return None
+        try:
+            return output.read(name)
+        except (OSError, KeyError):
+            return None
+
+    @staticmethod
+    async def __producer(scheduler: WorkScheduler,
+                         producer_proxy: ProducerProxy) -> None:
+        """
+        Add the proxies to the index lane and close the scheduler
+
+        :param scheduler: WorkScheduler object shared with the runners
+        :param producer_proxy: ProducerProxy object with the proxies
+        """
+        await producer_proxy.execute()
+        # No more proxies, the runners stop when every lane is done
+        await scheduler.close()
+
+    @staticmethod
+    async def __worker(scheduler: WorkScheduler,
+                       producer_proxy: ProducerProxy,
+                       consumer_request: ConsumerRequest,
+                       runner: int) -> None:
+        """
+        Worker to process any work from the scheduler lanes, adding the
+        work found to the downstream lanes
+
+        :param scheduler: WorkScheduler object shared with the runners
+        :param producer_proxy: ProducerProxy object with the proxies
+        :param consumer_request: ConsumerRequest object for the runner
+        :param runner: index of the current runner
+        """
+        # Cycle while there's work from the scheduler
+        work = await scheduler.get()
+        while work is not None:
+            lane, item = work
+            try:
+                if lane == LANE_INDEX:
+                    # Extract the hosts using the proxy
+                    proxy = producer_proxy.get_proxy(item)
+                    hosts = await consumer_request.scan_index(
+                        proxy_index=item,
+                        proxies_totals=len(producer_proxy),
+                        proxy=proxy,
+                        runner=runner,
+                        list_index=producer_proxy.get_list_index(item))
+                    for (host_index, host) in enumerate(hosts):
+                        await scheduler.put(LANE_CONFIG,
+                                            (host, host_index, len(hosts),
+                                             proxy))
+                elif lane == LANE_CONFIG:
+                    # Extract the profiles links for a host
+                    host, host_index, hosts_totals, proxy = item
+                    links = await consumer_request.download_config(
+                        host=host,
+                        host_index=host_index,
+                        hosts_totals=hosts_totals,
+                        proxy=proxy,
+                        runner=runner)
+                    for (link_index, link) in enumerate(links):
+                        await scheduler.put(LANE_PROFILE,
+                                            (link, link_index, len(links),
+                                             proxy))
+                else:
+                    # Download a profile
+                    link, link_index, links_totals, proxy = item
+                    await consumer_request.download_profile(
+                        link=link,
+                        link_index=link_index,
+                        links_totals=links_totals,
+                        proxy=proxy,
+                        runner=runner)
+            finally:
+                await scheduler.done(lane)
+            work = await scheduler.get()
+
+
+async def scan(config: Config) -> 'typing.AsyncIterator[tuple]':
+    """
+    Scan the hosts with a new Extractor, use an Extractor object to share
+    the resources between several scans
+
+    :param config: options to use for the scan
+    :return: asynchronous generator of (result type, value) tuples
+    """
+    async with Extractor() as extractor:
+        async for result in extractor.scan(config):
+            yield result
@@ -0,0 +1,143 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import sys
+import urllib.parse
+
+
+class Host(object):
+    # Many hosts are kept in memory, avoid a dictionary for each host
+    __slots__ = ('country', 'hostname', 'config_url',
+                 'fqdn', 'ip', 'tcp', 'udp',
+                 'score', 'speed', 'ping', 'uptime', 'sessions')
+
+    def __init__(self,
+                 country: str,
+                 hostname: str,
+                 config_url: str,
+                 score: int = None,
+                 speed: float = None,
+                 ping: int = None,
+                 uptime: int = None,
+                 sessions: int = None) -> None:
+        """
+        Host object with the data for a VPN host, the configuration URL
+        arguments are parsed only once
+
+        :param country: country of the host
+        :param hostname: hostname shown in the hosts table
+        :param config_url: full URL of the configuration page
+        :param score: quality score, None if unknown
+        :param speed: line speed in Mbps, None if unknown
+        :param ping: ping time in milliseconds, None if unknown
+        :param uptime: uptime in seconds, None if unknown
+        :param sessions: number of VPN sessions, None if unknown
+        """
+        self.country = sys.intern(country)
+        self.hostname = hostname
+        self.config_url = config_url
+        self.score = score
+        self.speed = speed
+        self.ping = ping
+        self.uptime = uptime
+        self.sessions = sessions
+        arguments = urllib.parse.parse_qs(
+            urllib.parse.urlsplit(config_url).query)
+        self.fqdn = arguments.get('fqdn', [''])[0]
+        self.ip = arguments.get('ip', [''])[0]
+        # Ports are 0 for unavailable protocols
+        self.tcp = int(arguments.get('tcp', ['0'])[0] or 0)
+        self.udp = int(arguments.get('udp', ['0'])[0] or 0)
+
+    def get_address(self,
+                    host_type: str) -> str:
+        """
+        Get the host address
+
+        :param host_type: address type, either fqdn or ip
+        :return: hostname or IP address
+        """
+        return self.fqdn if host_type == 'fqdn' else self.ip
+
+    def get_port(self,
+                 protocol: str) -> int:
+        """
+        Get the port number for a protocol
+
+        :param protocol: protocol type, either tcp or udp
+        :return: port number, 0 if the protocol is unavailable
+        """
+        return self.tcp if protocol == 'tcp' else self.udp
+
+    @property
+    def key(self) -> tuple:
+        """
+        Get the identity of the host, used to recognize the same host
+        across pages, proxies and scans
+
+        :return: (fqdn, ip, tcp, udp) tuple
+        """
+        return (self.fqdn, self.ip, self.tcp, self.udp)
+
+    def __repr__(self) -> str:
+        return ('Host({HOSTNAME}, {IP}, tcp={TCP}, udp={UDP}, '
+                'score={SCORE}, speed={SPEED}, ping={PING})'.format(
+                    HOSTNAME=self.hostname,
+                    IP=self.ip,
+                    TCP=self.tcp,
+                    UDP=self.udp,
+                    SCORE=self.score,
+                    SPEED=self.speed,
+                    PING=self.ping))
+
+
+def filter_hosts(hosts: list,
+                 *,
+                 min_speed: float = 0,
+                 max_ping: int = 0,
+                 min_score: int = 0,
+                 top: int = 0) -> list:
+    """
+    Filter the hosts by their quality, hosts with unknown values are
+    excluded by any filter on those values
+
+    :param hosts: list of Host objects
+    :param min_speed: minimum line speed in Mbps, 0 for any speed
+    :param max_ping: maximum ping time in milliseconds, 0 for any ping
+    :param min_score: minimum quality score, 0 for any score
+    :param top: number of the hosts with the best score to keep, 0 to
+                keep any host
+    :return: list of the matching Host objects
+    """
+    if min_speed:
+        hosts = [host for host in hosts
+                 if host.speed is not None and host.speed >= min_speed]
+    if max_ping:
+        hosts = [host for host in hosts
+                 if host.ping is not None and host.ping <= max_ping]
+    if min_score:
+        hosts = [host for host in hosts
+                 if host.score is not None and host.score >= min_score]
+    if top:
+        hosts = sorted(hosts,
+                       key=lambda host: host.score or 0,
+                       reverse=True)[:top]
+    return hosts
@@ -0,0 +1,187 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import os
+import os.path
+import tarfile
+
+from .index_parser import parse_hosts
+
+
+def read_snapshots(paths: list,
+                   verbose_level: int = 0) -> 'typing.Iterator[tuple]':
+    """
+    Read the saved index pages from files, directories or tar archives,
+    the files and the archive members which cannot be read are reported
+    and skipped
+
+    :param paths: list of files, directories or tar archives paths
+    :param verbose_level: verbose level for messages
+    :return: iterator of (source name, page content) tuples
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for (directory, folders, files) in os.walk(path):
+                folders.sort()
+                yield from read_snapshots([os.path.join(directory, filename)
+                                           for filename in sorted(files)],
+                                          verbose_level)
+            continue
+        try:
+            if tarfile.is_tarfile(path):
+                with tarfile.open(path, 'r:*') as archive:
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+                        source = '{PATH}:{NAME}'.format(PATH=path,
+                                                        NAME=member.name)
+                        try:
+                            page_content = archive.extractfile(member).read()
+                        except (OSError, tarfile.TarError) as error:
+                            report_error(source, error, verbose_level)
+                            continue
+                        yield (source, page_content)
+            else:
+                with open(path, 'rb') as snapshot_file:
+                    page_content = snapshot_file.read()
+                yield (path, page_content)
+        except (OSError, tarfile.TarError) as error:
+            report_error(path, error, verbose_level)
+
+
+def report_error(source: str,
+                 error: Exception,
+                 verbose_level: int = 0) -> None:
+    """
+    Report a saved index page which cannot be read or parsed
+
+    :param source: source name of the page
+    :param error: exception raised
+    :param verbose_level: verbose level for messages
+    """
+    if verbose_level >= 1:
+        print('Skipping {SOURCE}: {ERROR}'.format(SOURCE=source,
+                                                  ERROR=repr(error)))
+
+
+def parse_snapshot(page_content: bytes,
+                   url: str,
+                   country: str) -> list:
+    """
+    Parse a saved index page, this is executed in the worker processes
+
+    :param page_content: index page content
+    :param url: URL of the index page, used to resolve the links
+    :param country: country of the hosts to return
+    :return: list of Host objects
+    """
+    return parse_hosts(page_content=page_content.decode('utf-8', 'replace'),
+                       url=url,
+                       country=country)
+
+
+def get_unique_snapshots(snapshots: 'typing.Iterable[tuple]',
+                         verbose_level: int = 0
+                         ) -> 'typing.Iterator[tuple]':
+    """
+    Skip the identical saved index pages
+
+    :param snapshots: iterable of (source name, page content) tuples
+    :param verbose_level: verbose level for messages
+    :return: iterator of (source name, page content) tuples
+    """
+    hashes = set()
+    for (source, page_content) in snapshots:
+        page_hash = hashlib.sha256(page_content).digest()
+        if page_hash in hashes:
+            continue
+        hashes.add(page_hash)
+        if verbose_level >= 2:
+            print('Parsing {SOURCE}'.format(SOURCE=source))
+        yield (source, page_content)
+
+
+async def load_hosts(paths: list,
+                     url: str,
+                     country: str,
+                     workers: int = None,
+                     verbose_level: int = 0) -> list:
+    """
+    Load the hosts from the saved index pages, parsing them in parallel
+    across a processes pool. The identical pages are parsed only once and
+    the hosts are merged, the latest page wins for the same host. The
+    pages which cannot be parsed are reported and skipped
+
+    :param paths: list of files, directories or tar archives paths
+    :param url: URL of the index page, used to resolve the links
+    :param country: country of the hosts to return
+    :param workers: number of worker processes, None for the CPUs count
+    :param verbose_level: verbose level for messages
+    :return: list of Host objects
+    """
+    workers = workers or os.cpu_count() or 1
+    snapshots = get_unique_snapshots(read_snapshots(paths, verbose_level),
+                                     verbose_level)
+    # Read the first pages to not start more processes than pages
+    first_snapshots = list(itertools.islice(snapshots, workers))
+    workers = max(min(workers, len(first_snapshots)), 1)
+    snapshots = itertools.chain(first_snapshots, snapshots)
+    sources = []
+    results = []
+    if workers == 1:
+        # A single worker parses the pages in this process, without
+        # starting the processes pool
+        for (source, page_content) in snapshots:
+            sources.append(source)
+            try:
+                results.append(parse_snapshot(page_content, url, country))
+            except Exception as error:
+                results.append(error)
+    else:
+        loop = asyncio.get_running_loop()
+        # Limit the pages read and not yet parsed
+        pending = asyncio.Semaphore(workers * 2)
+        futures = []
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            for (source, page_content) in snapshots:
+                await pending.acquire()
+                future = loop.run_in_executor(executor,
+                                              parse_snapshot,
+                                              page_content,
+                                              url,
+                                              country)
+                future.add_done_callback(lambda _: pending.release())
+                futures.append(future)
+                sources.append(source)
+            # A corrupted page doesn't stop the other pages
+            results = await asyncio.gather(*futures, return_exceptions=True)
+    hosts = {}
+    for (source, result) in zip(sources, results):
+        if isinstance(result, Exception):
+            report_error(source, result, verbose_level)
+            continue
+        for host in result:
+            hosts[host.key] = host
+    return list(hosts.values())
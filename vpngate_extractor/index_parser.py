@@ -0,0 +1,203 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import re
+import urllib.parse
+
+from .host import Host
+
+
+# Column index where lookup the country
+TABLE_COLUMN_COUNTRY = 0
+# Text for country lookup
+TABLE_COLUMN_COUNTRY_TITLE = 'Country(Physical location)'
+# Column index with server hostname
+TABLE_COLUMN_HOSTNAME = 1
+# Column index with VPN sessions and uptime
+TABLE_COLUMN_SESSIONS = 2
+# Column index with line speed and ping
+TABLE_COLUMN_QUALITY = 3
+# Column index where lookup the hyperlink configuration
+TABLE_COLUMN_CONFIG = 6
+# Column index with the quality score
+TABLE_COLUMN_SCORE = 9
+# Patterns for the quality columns
+PATTERN_SESSIONS = re.compile(r'([\d,]+)\s*sessions?', re.IGNORECASE)
+PATTERN_UPTIME = re.compile(r'([\d,]+)\s*(min|hour|day)', re.IGNORECASE)
+PATTERN_SPEED = re.compile(r'([\d,.]+)\s*Mbps', re.IGNORECASE)
+PATTERN_PING = re.compile(r'Ping:\s*([\d,]+)\s*ms', re.IGNORECASE)
+PATTERN_SCORE = re.compile(r'[\d,]+')
+# Seconds for each uptime unit
+UPTIME_UNITS = {'min': 60, 'hour': 3600, 'day': 86400}
+# Table hosts ID
+TABLE_HOSTS_ID = 'vg_hosts_table_id'
+
+
+def fix_page(page_content: str) -> str:
+    """
+    Apply page fixes for broken tables
+
+    :param page_content: index page content
+    :return: fixed page content
+    """
+    page_content = page_content.replace(
+        "<td class='vg_table_header'><b>Score</b><BR>"
+        "(Quality)</td>\r\n</td>",
+        "<td class='vg_table_header'><b>Score</b><BR>(Quality)</td>")
+    page_content = page_content.replace(
+        "<td class='vg_table_header'><b>Score</b><br/>"
+        "(Quality)</td>\r\n</tr></table></span></p></td>",
+        "<td class='vg_table_header'><b>Score</b><BR>(Quality)</td>")
+    return page_content
+
+
+def get_hosts_section(page_content: str) -> str:
+    """
+    Get the part of the page from the first hosts table to the last table
+    end, the rest of the page is not needed for the hosts
+
+    :param page_content: index page content
+    :return: part of the page with the hosts tables, empty if missing
+    """
+    lower_content = page_content.lower()
+    position = lower_content.find(TABLE_HOSTS_ID)
+    if position < 0:
+        return ''
+    start = lower_content.rfind('<table', 0, position)
+    end = lower_content.rfind('</table>')
+    if start < 0 or end < position:
+        # Unexpected page layout, use the whole page
+        return page_content
+    return page_content[start:end + len('</table>')]
+
+
+def parse_number(pattern: 're.Pattern',
+                 text: str,
+                 number_type: type = int) -> 'typing.Union[int, float]':
+    """
+    Parse a number from a text
+
+    :param pattern: regular expression with the number as first group or
+                    as the whole match
+    :param text: text where to look for the number
+    :param number_type: type of the number, int or float
+    :return: the parsed number, None if missing
+    """
+    match = pattern.search(text)
+    if not match:
+        return None
+    number = match.group(1) if pattern.groups else match.group(0)
+    return number_type(number.replace(',', ''))
+
+
+def parse_uptime(text: str) -> int:
+    """
+    Parse the host uptime
+
+    :param text: text with the uptime, like 3 days
+    :return: uptime in seconds, None if missing
+    """
+    match = PATTERN_UPTIME.search(text)
+    if not match:
+        return None
+    return (int(match.group(1).replace(',', '')) *
+            UPTIME_UNITS[match.group(2).lower()])
+
+
+def parse_hosts(page_content: str,
+                url: str,
+                country: str = None) -> list:
+    """
+    Parse the hosts table from the index page
+
+    :param page_content: index page content
+    :param url: URL of the index page, used to resolve the links
+    :param country: country of the hosts to return, None for any country
+    :return: list of Host objects
+    """
+    # BeautifulSoup is loaded only when a page has to be parsed
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    hosts = []
+    # Only the hosts tables are parsed, the rest of the page is skipped
+    bsoup = BeautifulSoup(get_hosts_section(fix_page(page_content)),
+                          'html.parser',
+                          parse_only=SoupStrainer('table', id=TABLE_HOSTS_ID))
+    # Find the servers table (which has Country on the first line)
+    for hosts_table in bsoup.find_all('table', id=TABLE_HOSTS_ID):
+        table_rows = hosts_table.find_all('tr')
+        table_cells = table_rows[0].find_all('td') if table_rows else []
+        # Find the cell with the country title
+        if (not table_cells or
+                table_cells[TABLE_COLUMN_COUNTRY].get_text() !=
+                TABLE_COLUMN_COUNTRY_TITLE):
+            continue
+        # Process the hosts table
+        for table_row in table_rows:
+            table_cells = table_row.find_all('td')
+            # Skip short or malformed rows
+            if len(table_cells) <= TABLE_COLUMN_CONFIG:
+                continue
+            # Skip rows with the country title
+            cell_country = table_cells[TABLE_COLUMN_COUNTRY].get_text()
+            if cell_country == TABLE_COLUMN_COUNTRY_TITLE:
+                continue
+            if country is not None and cell_country != country:
+                continue
+            cell_hostname = table_cells[TABLE_COLUMN_HOSTNAME].get_text()
+            config_links = table_cells[TABLE_COLUMN_CONFIG].find_all('a')
+            if not config_links:
+                continue
+            # Quality columns
+            cell_sessions = table_cells[TABLE_COLUMN_SESSIONS].get_text(' ')
+            cell_quality = table_cells[TABLE_COLUMN_QUALITY].get_text(' ')
+            cell_score = (table_cells[TABLE_COLUMN_SCORE].get_text()
+                          if len(table_cells) > TABLE_COLUMN_SCORE else '')
+            for link in config_links:
+                hosts.append(Host(
+                    country=cell_country,
+                    hostname=cell_hostname,
+                    config_url=urllib.parse.urljoin(url, link.get('href')),
+                    score=parse_number(PATTERN_SCORE, cell_score),
+                    speed=parse_number(PATTERN_SPEED, cell_quality, float),
+                    ping=parse_number(PATTERN_PING, cell_quality),
+                    uptime=parse_uptime(cell_sessions),
+                    sessions=parse_number(PATTERN_SESSIONS, cell_sessions)))
+    return hosts
+
+
+def parse_profile_links(page_content: str) -> list:
+    """
+    Parse the OpenVPN profiles links from a configuration page
+
+    :param page_content: configuration page content
+    :return: list of the links ending with .ovpn
+    """
+    # BeautifulSoup is loaded only when a page has to be parsed
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    bsoup = BeautifulSoup(page_content,
+                          'html.parser',
+                          parse_only=SoupStrainer('a'))
+    # Cycle over each link, ending with '.ovpn'
+    return [link.get('href')
+            for link in bsoup.find_all('a')
+            if link.get('href', '').endswith('.ovpn')]
@@ -0,0 +1,182 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import hashlib
+import json
+import os
+import os.path
+import sys
+
+from . import constants
+
+# Manifest file format version
+MANIFEST_VERSION = 1
+
+
+class Manifest(object):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        Manifest object with the names, sizes, modification times and
+        hashes of the profiles in a destination folder. The manifest is
+        stored in a sub folder, so writing it doesn't change the
+        destination folder modification time, which is used to detect any
+        change to the profiles made outside of the application
+
+        :param path: path of the destination folder
+        """
+        self.path = path
+        self.filepath = os.path.join(path,
+                                     constants.MANIFEST_FOLDER,
+                                     constants.MANIFEST_FILENAME)
+        # Profile name -> [size, modification time, sha256 hash]
+        self.profiles = {}
+        # Destination folder modification time matching the profiles
+        self.__directory_mtime = None
+        self.__changed = False
+
+    @staticmethod
+    def __get_hash(filepath: str) -> str:
+        """
+        Get the hash for a file
+
+        :param filepath: path of the file
+        :return: sha256 hexadecimal hash
+        """
+        with open(filepath, 'rb') as profile_file:
+            return hashlib.sha256(profile_file.read()).hexdigest()
+
+    def load(self) -> set:
+        """
+        Load the manifest, the destination folder is scanned only if it
+        was changed after the manifest was saved
+
+        :return: set of the profiles names
+        """
+        directory_mtime = os.stat(self.path).st_mtime_ns
+        stored_mtime = None
+        if os.path.isfile(self.filepath):
+            with open(self.filepath, 'r') as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get('version') == MANIFEST_VERSION:
+                stored_mtime = manifest['directory_mtime']
+                self.profiles = {sys.intern(name): values
+                                 for (name, values)
+                                 in manifest['profiles'].items()}
+        if stored_mtime != directory_mtime:
+            self.reconcile()
+        else:
+            self.__directory_mtime = directory_mtime
+        return set(self.profiles)
+
+    def reconcile(self) -> None:
+        """
+        Update the manifest with the files in the destination folder,
+        the hash is computed only for new or changed files
+        """
+        # Any file added during the scan changes the modification time
+        # again, so it will be found by the next reconcile
+        directory_mtime = os.stat(self.path).st_mtime_ns
+        profiles = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                status = entry.stat()
+                values = self.profiles.get(entry.name)
+                if (values is None or
+                        values[0] != status.st_size or
+                        values[1] != status.st_mtime_ns):
+                    values = [status.st_size,
+                              status.st_mtime_ns,
+                              self.__get_hash(entry.path)]
+                profiles[sys.intern(entry.name)] = values
+        self.profiles = profiles
+        self.__directory_mtime = directory_mtime
+        self.__changed = True
+
+    def add(self,
+            name: str,
+            data: bytes,
+            directory_mtime: int = None) -> None:
+        """
+        Add a profile written to the destination folder, the destination
+        folder modification time is updated if it wasn't changed outside
+        of the application before the write
+
+        :param name: profile name
+        :param data: profile content
+        :param directory_mtime: destination folder modification time
+                                before the write
+        """
+        status = os.stat(os.path.join(self.path, name))
+        self.profiles[name] = [status.st_size,
+                               status.st_mtime_ns,
+                               hashlib.sha256(data).hexdigest()]
+        self.__update_directory_mtime(directory_mtime)
+
+    def remove(self,
+               name: str,
+               directory_mtime: int = None) -> None:
+        """
+        Remove a profile deleted from the destination folder
+
+        :param name: profile name
+        :param directory_mtime: destination folder modification time
+                                before the deletion
+        """
+        self.profiles.pop(name, None)
+        self.__update_directory_mtime(directory_mtime)
+
+    def __update_directory_mtime(self,
+                                 directory_mtime: int) -> None:
+        """
+        Update the destination folder modification time after a change
+        made by the application, unless the folder was changed outside
+        of the application before
+
+        :param directory_mtime: destination folder modification time
+                                before the change
+        """
+        if directory_mtime == self.__directory_mtime:
+            self.__directory_mtime = os.stat(self.path).st_mtime_ns
+        self.__changed = True
+
+    def save(self) -> None:
+        """
+        Save the manifest if changed, the file is replaced atomically.
+        The destination folder is reconciled again if it was changed
+        outside of the application since the last reconcile or write
+        """
+        if os.stat(self.path).st_mtime_ns != self.__directory_mtime:
+            self.reconcile()
+        if not self.__changed:
+            return
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        temporary_path = '{FILE}.tmp'.format(FILE=self.filepath)
+        with open(temporary_path, 'w') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION,
+                       'directory_mtime': self.__directory_mtime,
+                       'profiles': self.profiles},
+                      manifest_file,
+                      separators=(',', ':'))
+        os.replace(temporary_path, self.filepath)
+        self.__changed = False
@@ -29,6 +29,48 @@ class OpenVPNProfile(object):
         with open(template_path, 'r') as template_file:
             self.template_text = template_file.read()
 
+    def render(self,
+               protocol: str,
+               host: str,
+               port: int) -> str:
+        """
+        Render the OpenVPN profile text
+        :param protocol: specify the protocol used for the connection, can only
+                         be either tcp or udp
+        :param host: specify the hostname or IP address where to connect
+        :param port: specify the port number used for connection
+        :return: profile text with CRLF line endings
+        """
+        return self.template_text.format(PROTOCOL=protocol,
+                                         HOST=host,
+                                         PORT=port).replace('\n', '\r\n')
+
+    def render_remotes(self,
+                       protocol: str,
+                       remotes: list,
+                       server_poll_timeout: int) -> str:
+        """
+        Render an OpenVPN profile text with many remotes, the client picks
+        a random remote and tries the next one on failure
+        :param protocol: specify the protocol used for the connection, can only
+                         be either tcp or udp
+        :param remotes: list of (host, port) tuples where to connect
+        :param server_poll_timeout: seconds to wait for each remote
+        :return: profile text with CRLF line endings
+        """
+        lines = []
+        for line in self.template_text.split('\n'):
+            if '{HOST}' in line:
+                # Repeat the remote line for each remote
+                lines.extend(line.format(HOST=host, PORT=port)
+                             for (host, port) in remotes)
+                lines.append('remote-random')
+                lines.append('server-poll-timeout {TIMEOUT}'.format(
+                    TIMEOUT=server_poll_timeout))
+            else:
+                lines.append(line.format(PROTOCOL=protocol))
+        return '\r\n'.join(lines)
+
     def create(self,
                filepath: str,
                protocol: str,
@@ -43,7 +85,7 @@ class OpenVPNProfile(object):
         :param port: specify the port number used for connection
         :return: None
         """
-        with open(filepath, mode='w', newline='\r\n') as profile_file:
-            profile_file.write(self.template_text.format(PROTOCOL=protocol,
-                                                         HOST=host,
-                                                         PORT=port))
+        with open(filepath, mode='w', newline='') as profile_file:
+            profile_file.write(self.render(protocol=protocol,
+                                           host=host,
+                                           port=port))
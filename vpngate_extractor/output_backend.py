@@ -0,0 +1,410 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import io
+import os
+import os.path
+import shutil
+import sqlite3
+import sys
+import tarfile
+import time
+import warnings
+import zipfile
+
+from . import constants
+from .manifest import Manifest
+
+
+class OutputBackend(object):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        OutputBackend object to store the profiles, the names of the
+        stored profiles are kept as an index for the existence check
+
+        :param path: path of the destination folder or file
+        """
+        self.path = path
+        self.names = set()
+
+    def exists(self,
+               name: str) -> bool:
+        """
+        Check if a profile was already stored
+
+        :param name: profile name
+        :return: boolean value for existing profile
+        """
+        return name in self.names
+
+    def write(self,
+              name: str,
+              content: str) -> None:
+        """
+        Store a profile, replacing any profile with the same name
+
+        :param name: profile name
+        :param content: profile text
+        """
+        raise NotImplementedError
+
+    def delete(self,
+               name: str) -> None:
+        """
+        Delete a stored profile
+
+        :param name: profile name
+        """
+        raise NotImplementedError
+
+    def read(self,
+             name: str) -> str:
+        """
+        Read a stored profile, a missing profile raises KeyError or OSError
+
+        :param name: profile name
+        :return: profile text
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Make the stored profiles durable
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Close the backend
+        """
+        pass
+
+
+class DirectoryOutput(OutputBackend):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        DirectoryOutput object to store each profile as a file, the index
+        is loaded from the manifest instead of listing the folder
+
+        :param path: path of the destination folder
+        """
+        super().__init__(path)
+        self.manifest = Manifest(path)
+        self.names = self.manifest.load()
+
+    def write(self,
+              name: str,
+              content: str) -> None:
+        data = content.encode('utf-8')
+        directory_mtime = os.stat(self.path).st_mtime_ns
+        with open(os.path.join(self.path, name), 'wb') as profile_file:
+            profile_file.write(data)
+        self.manifest.add(name, data, directory_mtime)
+        self.names.add(name)
+
+    def delete(self,
+               name: str) -> None:
+        directory_mtime = os.stat(self.path).st_mtime_ns
+        os.remove(os.path.join(self.path, name))
+        self.manifest.remove(name, directory_mtime)
+        self.names.discard(name)
+
+    def read(self,
+             name: str) -> str:
+        with open(os.path.join(self.path, name),
+                  mode='r',
+                  newline='') as profile_file:
+            return profile_file.read()
+
+    def flush(self) -> None:
+        self.manifest.save()
+        # Use the profiles found by the reconcile, including the deletions
+        self.names = set(self.manifest.profiles)
+
+    def close(self) -> None:
+        self.manifest.save()
+
+
+class ZipOutput(OutputBackend):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        ZipOutput object to append the profiles to a single zip archive.
+        The profiles are appended to a staging copy of the archive which
+        replaces the archive when flushed, so an interrupted process never
+        damages the stored profiles
+
+        :param path: path of the zip file
+        """
+        super().__init__(path)
+        self.__staging_path = '{FILE}.tmp'.format(FILE=path)
+        self.__staged = False
+        self.__archive = None
+        members = 0
+        if os.path.exists(path):
+            self.__archive = zipfile.ZipFile(path, mode='r')
+            self.names = set(map(sys.intern, self.__archive.namelist()))
+            members = len(self.__archive.infolist())
+        # Replaced or deleted profiles are removed from the archive when
+        # it's flushed
+        self.__superseded = len(self.names) != members
+
+    def __stage(self) -> None:
+        """
+        Open the staging copy of the archive for appending
+        """
+        if self.__staged:
+            return
+        if self.__archive:
+            self.__archive.close()
+            shutil.copyfile(self.path, self.__staging_path)
+            mode = 'a'
+        else:
+            mode = 'w'
+        self.__archive = zipfile.ZipFile(self.__staging_path,
+                                         mode=mode,
+                                         compression=zipfile.ZIP_DEFLATED)
+        self.__staged = True
+
+    def __compact(self,
+                  source_path: str) -> None:
+        """
+        Write the archive with only the last member for each stored
+        profile
+
+        :param source_path: path of the closed archive to compact
+        """
+        temporary_path = '{FILE}.compact'.format(FILE=self.path)
+        with zipfile.ZipFile(source_path, mode='r') as source, \
+                zipfile.ZipFile(temporary_path,
+                                mode='w',
+                                compression=zipfile.ZIP_DEFLATED) as archive:
+            members = {member.filename: member
+                       for member in source.infolist()
+                       if member.filename in self.names}
+            for member in members.values():
+                archive.writestr(member, source.read(member))
+        os.replace(temporary_path, self.path)
+
+    def __commit(self) -> None:
+        """
+        Close the archive and replace it with the staging copy
+        """
+        if self.__archive:
+            # The central directory is written only when the archive is
+            # closed
+            self.__archive.close()
+            self.__archive = None
+        if self.__superseded:
+            self.__compact(self.__staging_path if self.__staged
+                           else self.path)
+            if self.__staged:
+                os.remove(self.__staging_path)
+        elif self.__staged:
+            os.replace(self.__staging_path, self.path)
+        self.__staged = False
+        self.__superseded = False
+
+    def write(self,
+              name: str,
+              content: str) -> None:
+        self.__stage()
+        member = zipfile.ZipInfo(name, time.localtime()[:6])
+        member.compress_type = zipfile.ZIP_DEFLATED
+        if name in self.names:
+            self.__superseded = True
+        with warnings.catch_warnings():
+            # A replaced profile is appended again, the last member wins
+            # until the archive is compacted
+            warnings.simplefilter('ignore', UserWarning)
+            self.__archive.writestr(member, content)
+        self.names.add(name)
+
+    def delete(self,
+               name: str) -> None:
+        self.names.discard(name)
+        self.__superseded = True
+
+    def read(self,
+             name: str) -> str:
+        if not self.__archive:
+            raise KeyError(name)
+        return self.__archive.read(name).decode('utf-8')
+
+    def flush(self) -> None:
+        self.__commit()
+        if os.path.exists(self.path):
+            self.__archive = zipfile.ZipFile(self.path, mode='r')
+
+    def close(self) -> None:
+        self.__commit()
+
+
+class TarOutput(OutputBackend):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        TarOutput object to append the profiles to a single tar archive
+
+        :param path: path of the uncompressed tar file
+        """
+        super().__init__(path)
+        self.__archive = None
+        self.__open()
+        self.names = set(map(sys.intern, self.__archive.getnames()))
+        # Replaced or deleted profiles are removed from the archive when
+        # it's closed
+        self.__superseded = len(self.names) != len(
+            self.__archive.getmembers())
+
+    def __open(self) -> None:
+        self.__archive = tarfile.open(self.path, mode='a')
+
+    def __compact(self) -> None:
+        """
+        Rewrite the closed archive with only the last member for each
+        stored profile
+        """
+        temporary_path = '{FILE}.tmp'.format(FILE=self.path)
+        with tarfile.open(self.path, mode='r') as source, \
+                tarfile.open(temporary_path, mode='w') as archive:
+            members = {member.name: member
+                       for member in source.getmembers()
+                       if member.name in self.names}
+            for member in members.values():
+                archive.addfile(member, source.extractfile(member))
+        os.replace(temporary_path, self.path)
+        self.__superseded = False
+
+    def write(self,
+              name: str,
+              content: str) -> None:
+        data = content.encode('utf-8')
+        member = tarfile.TarInfo(name)
+        member.size = len(data)
+        member.mtime = int(time.time())
+        if name in self.names:
+            self.__superseded = True
+        # A replaced profile is appended again, the last member wins
+        # until the archive is compacted
+        self.__archive.addfile(member, io.BytesIO(data))
+        self.names.add(name)
+
+    def delete(self,
+               name: str) -> None:
+        self.names.discard(name)
+        self.__superseded = True
+
+    def read(self,
+             name: str) -> str:
+        # Archives opened for appending cannot extract, the member data is
+        # read directly from the file
+        member = self.__archive.getmember(name)
+        self.__archive.fileobj.flush()
+        with open(self.path, 'rb') as archive_file:
+            archive_file.seek(member.offset_data)
+            return archive_file.read(member.size).decode('utf-8')
+
+    def flush(self) -> None:
+        # The end of archive blocks are written only when the archive is
+        # closed
+        self.__archive.close()
+        if self.__superseded:
+            self.__compact()
+        self.__open()
+
+    def close(self) -> None:
+        self.__archive.close()
+        if self.__superseded:
+            self.__compact()
+
+
+class SqliteOutput(OutputBackend):
+    def __init__(self,
+                 path: str) -> None:
+        """
+        SqliteOutput object to store the profiles as rows of a sqlite
+        database
+
+        :param path: path of the database file
+        """
+        super().__init__(path)
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute('CREATE TABLE IF NOT EXISTS profiles ('
+                                  'name TEXT PRIMARY KEY, '
+                                  'content TEXT NOT NULL, '
+                                  'created REAL NOT NULL)')
+        self.names = set(sys.intern(name)
+                         for (name, ) in self.__connection.execute(
+                             'SELECT name FROM profiles'))
+
+    def write(self,
+              name: str,
+              content: str) -> None:
+        self.__connection.execute('INSERT OR REPLACE INTO profiles '
+                                  '(name, content, created) '
+                                  'VALUES (?, ?, ?)',
+                                  (name, content, time.time()))
+        self.names.add(name)
+
+    def delete(self,
+               name: str) -> None:
+        self.__connection.execute('DELETE FROM profiles WHERE name = ?',
+                                  (name, ))
+        self.names.discard(name)
+
+    def read(self,
+             name: str) -> str:
+        row = self.__connection.execute(
+            'SELECT content FROM profiles WHERE name = ?',
+            (name, )).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def flush(self) -> None:
+        self.__connection.commit()
+
+    def close(self) -> None:
+        self.__connection.commit()
+        self.__connection.close()
+
+
+OUTPUT_BACKENDS = {
+    constants.OUTPUT_DIRECTORY: DirectoryOutput,
+    constants.OUTPUT_ZIP: ZipOutput,
+    constants.OUTPUT_TAR: TarOutput,
+    constants.OUTPUT_SQLITE: SqliteOutput,
+}
+
+
+def open_output(output_format: str,
+                path: str) -> OutputBackend:
+    """
+    Open the output backend for the requested format
+
+    :param output_format: output format, see OUTPUT_BACKENDS
+    :param path: path of the destination folder or file
+    :return: OutputBackend object
+    """
+    return OUTPUT_BACKENDS[output_format](path)
@@ -18,32 +18,55 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 ##
 
-import asyncio
+import array
 
-from .settings import Settings
+from .proxy_list import ProxyList
+from .work_scheduler import WorkLane
 
 
 class ProducerProxy(object):
     def __init__(self,
-                 queue: asyncio.Queue) -> None:
+                 queue: WorkLane,
+                 proxy_list: ProxyList,
+                 proxies_order: array.array = None) -> None:
         """
         Creates a new ProducerProxy instance
-        :param queue: Queue to add items to
+        :param queue: WorkLane to add items to
+        :param proxy_list: list of the proxies to add
+        :param proxies_order: indexes of the proxies in the order to use,
+                              the list order is used if missing
         """
         self.queue = queue
-        # Prepares proxy list
-        settings = Settings.Instance()
-        with open(settings.proxies, 'r') as proxy_file:
-            self.proxy_list = ['{HOST}'.format(HOST=proxy.strip())
-                               for proxy in proxy_file.readlines()
-                               if not proxy.startswith('#')]
+        self.proxy_list = proxy_list
+        self.proxies_order = (proxies_order
+                              if proxies_order is not None
+                              else range(len(proxy_list)))
+
+    def get_proxy(self,
+                  proxy_index: int) -> str:
+        """
+        Get the proxy URL for a queue item
+        :param proxy_index: index of the proxy in the produced order
+        :return: proxy URL
+        """
+        return self.proxy_list[self.get_list_index(proxy_index)]
+
+    def get_list_index(self,
+                       proxy_index: int) -> int:
+        """
+        Get the index in the proxies list for a queue item
+        :param proxy_index: index of the proxy in the produced order
+        :return: index of the proxy in the proxies list
+        """
+        return self.proxies_order[proxy_index]
+
+    def __len__(self) -> int:
+        return len(self.proxies_order)
 
     async def execute(self) -> None:
         """
-        Produces a proxies list
+        Produces a proxies list, only the proxy index is added to the queue
         :return: None
         """
-        for (proxy_index, proxy) in enumerate(self.proxy_list):
-            await self.queue.put((proxy_index,
-                                  len(self.proxy_list),
-                                  'http://{URL}'.format(URL=proxy)))
+        for proxy_index in range(len(self.proxies_order)):
+            await self.queue.put(proxy_index)
@@ -0,0 +1,106 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+import re
+
+
+class ProfileGroups(object):
+    def __init__(self) -> None:
+        """
+        ProfileGroups object to collect the remotes for the consolidated
+        profiles, grouped by country and protocol
+        """
+        # (Country, protocol) -> dictionary with (host, port) keys, used
+        # as an ordered set
+        self.__groups = {}
+
+    def add(self,
+            country: str,
+            protocol: str,
+            host: str,
+            port: str) -> None:
+        """
+        Add a remote to the group for its country and protocol
+
+        :param country: country of the host
+        :param protocol: protocol used for the connection, tcp or udp
+        :param host: hostname or IP address where to connect
+        :param port: port number used for connection
+        """
+        self.__groups.setdefault((country, protocol), {})[(host, port)] = None
+
+    def get_profiles(self,
+                     remotes_per_profile: int = 0
+                     ) -> 'typing.Iterator[tuple]':
+        """
+        Get the consolidated profiles
+
+        :param remotes_per_profile: maximum number of remotes for each
+                                    profile, 0 for a single profile for
+                                    each group
+        :return: iterator of (profile name, protocol, remotes list) tuples
+        """
+        for (country, protocol), remotes in sorted(self.__groups.items()):
+            remotes = list(remotes)
+            size = remotes_per_profile or len(remotes)
+            chunks = [remotes[index:index + size]
+                      for index in range(0, len(remotes), size)]
+            for (chunk_index, chunk) in enumerate(chunks):
+                name = self.__get_group_name(country, protocol)
+                if len(chunks) > 1:
+                    name = '{NAME}_{INDEX:02d}'.format(NAME=name,
+                                                       INDEX=chunk_index + 1)
+                yield ('{NAME}.ovpn'.format(NAME=name), protocol, chunk)
+
+    def get_group_profiles(self,
+                           names: 'typing.Iterable[str]'
+                           ) -> 'typing.Iterator[str]':
+        """
+        Get the profile names belonging to the collected groups, with or
+        without the chunk number, used to find the profiles which are not
+        produced anymore
+
+        :param names: profile names to check
+        :return: iterator of the profile names belonging to the groups
+        """
+        if not self.__groups:
+            return
+        pattern = re.compile(r'^({NAMES})(_\d+)?\.ovpn$'.format(
+            NAMES='|'.join(re.escape(self.__get_group_name(country,
+                                                           protocol))
+                           for (country, protocol) in self.__groups)))
+        yield from filter(pattern.match, names)
+
+    @staticmethod
+    def __get_group_name(country: str,
+                         protocol: str) -> str:
+        """
+        Get the profile name for a group, without the chunk number
+
+        :param country: country of the group
+        :param protocol: protocol of the group
+        :return: profile name without extension
+        """
+        return 'vpngate_{COUNTRY}_{PROTOCOL}'.format(
+            COUNTRY=country.replace(' ', '_'),
+            PROTOCOL=protocol)
+
+    def __len__(self) -> int:
+        return len(self.__groups)
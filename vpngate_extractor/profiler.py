@@ -0,0 +1,147 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+
+from .stages import get_frame_name, get_stage
+
+
+class SamplingProfiler(object):
+    def __init__(self,
+                 interval: float = 0.005) -> None:
+        """
+        SamplingProfiler object to sample the event loop thread stack from
+        another thread, attributing each sample to the running task and
+        to its pipeline stage
+
+        :param interval: seconds between each sample
+        """
+        self.interval = interval
+        self.__loop = None
+        self.__loop_thread_id = None
+        self.__thread = None
+        self.__running = False
+        self.samples = 0
+        self.elapsed = 0.0
+        # Collapsed stack -> samples
+        self.stacks = collections.Counter()
+        self.stages = collections.Counter()
+        self.tasks = collections.Counter()
+        # Function -> samples as innermost frame and anywhere in the stack
+        self.self_samples = collections.Counter()
+        self.total_samples = collections.Counter()
+
+    def start(self) -> None:
+        """
+        Start sampling the running event loop
+        """
+        self.__loop = asyncio.get_running_loop()
+        self.__loop_thread_id = threading.get_ident()
+        self.__running = True
+        self.elapsed = time.monotonic()
+        self.__thread = threading.Thread(target=self.__sample,
+                                         name='profiler',
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop sampling
+        """
+        self.__running = False
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+            self.elapsed = time.monotonic() - self.elapsed
+
+    def __sample(self) -> None:
+        """
+        Sample the event loop thread stack
+        """
+        while self.__running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.__loop_thread_id)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self.__loop)
+            # Group the tasks with the same name prefix (runner-0001)
+            task_name = task.get_name().split('-')[0] if task else 'loop'
+            stage = get_stage(frame)
+            functions = []
+            while frame is not None:
+                functions.append(get_frame_name(frame).split(' (')[0])
+                frame = frame.f_back
+            functions.reverse()
+            self.samples += 1
+            self.stages[stage] += 1
+            self.tasks[task_name] += 1
+            self.stacks[';'.join([stage, task_name] + functions)] += 1
+            self.self_samples[functions[-1]] += 1
+            self.total_samples.update(set(functions))
+
+    def write_collapsed(self,
+                        filepath: str) -> None:
+        """
+        Write the samples as collapsed stacks, suitable for flamegraph
+        tools, the stage and the task are the first two frames
+
+        :param filepath: path of the collapsed stacks file
+        """
+        with open(filepath, 'w') as collapsed_file:
+            for (stack, count) in sorted(self.stacks.items()):
+                collapsed_file.write('{STACK} {COUNT}\n'.format(STACK=stack,
+                                                                COUNT=count))
+
+    def write_report(self,
+                     filepath: str,
+                     limit: int = 20) -> None:
+        """
+        Write a text report with the time for each stage and task and the
+        top functions
+
+        :param filepath: path of the report file
+        :param limit: number of functions to report
+        """
+        samples = self.samples or 1
+        lines = ['{SAMPLES} samples in {ELAPSED:.2f} seconds, '
+                 'one sample every {INTERVAL:.1f} ms'.format(
+                    SAMPLES=self.samples,
+                    ELAPSED=self.elapsed,
+                    INTERVAL=self.interval * 1000)]
+        for (title, counter, count) in (
+                ('Stages', self.stages, 0),
+                ('Tasks', self.tasks, 0),
+                ('Top functions by own samples', self.self_samples, limit),
+                ('Top functions by total samples', self.total_samples,
+                 limit)):
+            lines.append('')
+            lines.append('{TITLE}:'.format(TITLE=title))
+            for (name, value) in counter.most_common(count or None):
+                lines.append('  {PERCENT:6.2f}% {VALUE:8d}  {NAME}'.format(
+                    PERCENT=value / samples * 100,
+                    VALUE=value,
+                    NAME=name))
+        with open(filepath, 'w') as report_file:
+            report_file.write('\n'.join(lines) + '\n')
@@ -0,0 +1,186 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+import array
+import time
+
+# Number of buckets used to sort the proxies by their score
+SCORE_BUCKETS = 1000
+
+
+class ProxyHealth(object):
+    def __init__(self,
+                 failures_limit: int = 0,
+                 retry_time: int = 0) -> None:
+        """
+        ProxyHealth object to remember which proxies worked, it can be
+        shared across several scans in the same process. The results are
+        kept in arrays indexed by the position of the proxy in the
+        proxies list and they are reset when a different list is used
+
+        :param failures_limit: number of consecutive failures after which a
+                               proxy is skipped, 0 to never skip a proxy
+        :param retry_time: seconds after the last failure to try again a
+                           skipped proxy
+        """
+        self.failures_limit = failures_limit
+        self.retry_time = retry_time
+        self.__proxies = None
+        self.__successes = array.array('I')
+        self.__failures = array.array('I')
+        self.__consecutive_failures = array.array('I')
+        self.__last_failure = array.array('d')
+        self.__tested = 0
+
+    def __bind(self,
+               proxies: 'typing.Sequence[str]') -> None:
+        """
+        Use the results for a proxies list, resetting them for a new list
+
+        :param proxies: sequence of proxy URLs
+        """
+        if proxies is self.__proxies:
+            return
+        self.__proxies = proxies
+        self.__successes = array.array('I', bytes(4 * len(proxies)))
+        self.__failures = array.array('I', bytes(4 * len(proxies)))
+        self.__consecutive_failures = array.array('I',
+                                                  bytes(4 * len(proxies)))
+        self.__last_failure = array.array('d', bytes(8 * len(proxies)))
+        self.__tested = 0
+
+    def __is_tested(self,
+                    proxy_index: int) -> bool:
+        return (self.__successes[proxy_index] +
+                self.__failures[proxy_index]) > 0
+
+    def record_success(self,
+                       proxy_index: int) -> None:
+        """
+        Record a successful request using a proxy
+
+        :param proxy_index: index of the proxy in the proxies list
+        """
+        if not self.__is_tested(proxy_index):
+            self.__tested += 1
+        self.__successes[proxy_index] += 1
+        self.__consecutive_failures[proxy_index] = 0
+
+    def record_failure(self,
+                       proxy_index: int) -> None:
+        """
+        Record a failed request using a proxy
+
+        :param proxy_index: index of the proxy in the proxies list
+        """
+        if not self.__is_tested(proxy_index):
+            self.__tested += 1
+        self.__failures[proxy_index] += 1
+        self.__consecutive_failures[proxy_index] += 1
+        self.__last_failure[proxy_index] = time.monotonic()
+
+    def get_score(self,
+                  proxy_index: int) -> float:
+        """
+        Get the health score for a proxy
+
+        :param proxy_index: index of the proxy in the proxies list
+        :return: 1.0 for proxies which always worked, 0.0 for proxies
+                 which always failed and 0.5 for proxies never used
+        """
+        successes = self.__successes[proxy_index]
+        failures = self.__failures[proxy_index]
+        if successes + failures == 0:
+            return 0.5
+        return successes / (successes + failures)
+
+    def is_available(self,
+                     proxy_index: int) -> bool:
+        """
+        Check if a proxy should be used, proxies with too many consecutive
+        failures are skipped until the retry time has passed
+
+        :param proxy_index: index of the proxy in the proxies list
+        :return: boolean value for available proxy
+        """
+        if not self.failures_limit:
+            return True
+        return (self.__consecutive_failures[proxy_index] <
+                self.failures_limit or
+                time.monotonic() - self.__last_failure[proxy_index] >=
+                self.retry_time)
+
+    def sort(self,
+             proxies: 'typing.Sequence[str]') -> array.array:
+        """
+        Sort a proxies list, putting the healthiest proxies first, then the
+        proxies never used and then the failing proxies, excluding the
+        unavailable proxies. The proxies with the same score, rounded to
+        SCORE_BUCKETS steps, keep their order in the list
+
+        :param proxies: sequence of proxy URLs
+        :return: array with the indexes of the sorted proxies
+        """
+        self.__bind(proxies)
+        if not self.__tested:
+            # No proxies were used yet, keep the original order
+            return array.array('I', range(len(proxies)))
+        untested = array.array('I')
+        # Score bucket -> array with the indexes of the tested proxies
+        buckets = {}
+        for index in range(len(proxies)):
+            if not self.__is_tested(index):
+                untested.append(index)
+            elif self.is_available(index):
+                bucket = round(self.get_score(index) * SCORE_BUCKETS)
+                if bucket not in buckets:
+                    buckets[bucket] = array.array('I')
+                buckets[bucket].append(index)
+        result = array.array('I')
+        for bucket in sorted(buckets, reverse=True):
+            if bucket <= SCORE_BUCKETS // 2:
+                # Add the proxies never used before the failing proxies
+                result.extend(untested)
+                untested = None
+            result.extend(buckets[bucket])
+        if untested is not None:
+            result.extend(untested)
+        return result
+
+    def get_summary(self) -> dict:
+        """
+        Get the number of working, failing and skipped proxies
+
+        :return: dictionary with the proxies counts
+        """
+        working = 0
+        skipped = 0
+        for index in range(len(self.__successes)):
+            if self.__is_tested(index):
+                if self.__consecutive_failures[index] == 0:
+                    working += 1
+                if not self.is_available(index):
+                    skipped += 1
+        return {'working': working,
+                'failing': self.__tested - working,
+                'skipped': skipped}
+
+    def __len__(self) -> int:
+        return self.__tested
@@ -0,0 +1,114 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import array
+import socket
+
+# Size of a packed address, IPv4 addresses are stored as IPv4-mapped
+# IPv6 addresses
+ADDRESS_SIZE = 16
+IPV4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
+
+
+class ProxyList(object):
+    def __init__(self) -> None:
+        """
+        ProxyList object to store many proxies using packed addresses and
+        ports, the proxy URLs are built only when requested
+        """
+        self.__addresses = bytearray()
+        self.__ports = array.array('H')
+        # Index -> hostname, for proxies which are not IP addresses
+        self.__hostnames = {}
+
+    @classmethod
+    def load(cls,
+             filename: str) -> 'ProxyList':
+        """
+        Load the proxies list from a file with a host:port for each line
+
+        :param filename: path of the proxies list file
+        :return: ProxyList object with the proxies
+        """
+        proxy_list = cls()
+        with open(filename, 'r') as proxy_file:
+            for line in proxy_file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    proxy_list.append(line)
+        return proxy_list
+
+    def append(self,
+               proxy: str) -> None:
+        """
+        Add a proxy to the list
+
+        :param proxy: proxy address as host:port, IPv6 addresses between
+                      square brackets
+        """
+        host, _, port = proxy.rpartition(':')
+        host = host.strip('[]')
+        try:
+            packed = IPV4_MAPPED_PREFIX + socket.inet_pton(socket.AF_INET,
+                                                           host)
+        except OSError:
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, host)
+            except OSError:
+                # Not an IP address, keep the hostname
+                packed = bytes(ADDRESS_SIZE)
+                self.__hostnames[len(self.__ports)] = host
+        self.__addresses += packed
+        self.__ports.append(int(port))
+
+    def get_host(self,
+                 index: int) -> str:
+        """
+        Get the host for a proxy
+
+        :param index: index of the proxy
+        :return: hostname, IP address or IPv6 address between brackets
+        """
+        if index in self.__hostnames:
+            return self.__hostnames[index]
+        offset = index * ADDRESS_SIZE
+        packed = bytes(self.__addresses[offset:offset + ADDRESS_SIZE])
+        if packed.startswith(IPV4_MAPPED_PREFIX):
+            return socket.inet_ntop(socket.AF_INET, packed[12:])
+        return '[{ADDRESS}]'.format(
+            ADDRESS=socket.inet_ntop(socket.AF_INET6, packed))
+
+    def __getitem__(self,
+                    index: int) -> str:
+        """
+        Get the URL for a proxy
+
+        :param index: index of the proxy
+        :return: proxy URL
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError('proxy index out of range')
+        index %= len(self)
+        return 'http://{HOST}:{PORT}'.format(HOST=self.get_host(index),
+                                             PORT=self.__ports[index])
+
+    def __len__(self) -> int:
+        return len(self.__ports)
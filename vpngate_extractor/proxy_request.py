@@ -18,19 +18,23 @@
 #  along with this program.  If not, see <https://www.gnu.org/licenses/>.
 ##
 
-import aiohttp
+import asyncio
 
 
 class ProxyRequest(object):
     def __init__(self,
                  *,
-                 proxy: str) -> None:
+                 proxy: str,
+                 session: 'aiohttp.ClientSession' = None) -> None:
         """
         ProxyRequest object to send an HTTP request using a proxy URL
 
         :param proxy: URL of the proxy to use
+        :param session: shared HTTP session, a new session is created for
+                        each request if missing
         """
         self.proxy = proxy
+        self.session = session
         self.__timeout = 10
         self.exception = None
 
@@ -67,21 +71,45 @@ class ProxyRequest(object):
         :param retries: the number of retries to attempt to download the url
         :return: the downloaded content
         """
+        # aiohttp is loaded only when a network request is made
+        import aiohttp
+
         for attempt in range(retries):
             self.exception = None
             result = None
             try:
-                connector = aiohttp.TCPConnector(force_close=True)
-                async with aiohttp.ClientSession(connector=connector) as http:
-                    timeout = aiohttp.ClientTimeout(
-                        total=self.__timeout,
-                        connect=self.__timeout,
-                        sock_connect=self.__timeout,
-                        sock_read=self.__timeout)
-                    async with http.get(url,
-                                        proxy=self.proxy,
-                                        timeout=timeout) as request:
-                        result = await request.text(encoding='utf-8')
-            except (aiohttp.client.ClientError) as error:
+                timeout = aiohttp.ClientTimeout(
+                    total=self.__timeout,
+                    connect=self.__timeout,
+                    sock_connect=self.__timeout,
+                    sock_read=self.__timeout)
+                if self.session:
+                    result = await self.__get(self.session, url, timeout)
+                else:
+                    connector = aiohttp.TCPConnector(force_close=True)
+                    async with aiohttp.ClientSession(
+                            connector=connector) as http:
+                        result = await self.__get(http, url, timeout)
+            except (aiohttp.client.ClientError,
+                    asyncio.TimeoutError) as error:
                 self.exception = error
+            else:
+                break
         return result
+
+    async def __get(self,
+                    http: 'aiohttp.ClientSession',
+                    url: str,
+                    timeout: 'aiohttp.ClientTimeout') -> str:
+        """
+        Download the requested url using an HTTP session.
+
+        :param http: the HTTP session to use
+        :param url: the resource to download
+        :param timeout: the timeout for the request
+        :return: the downloaded content
+        """
+        async with http.get(url,
+                            proxy=self.proxy,
+                            timeout=timeout) as request:
+            return await request.text(encoding='utf-8')
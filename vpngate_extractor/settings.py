@@ -22,6 +22,7 @@ import argparse
 import os
 
 from . import constants
+from .config import Config
 from .singleton import Singleton
 
 
@@ -29,7 +30,17 @@ from .singleton import Singleton
 class Settings(object):
     def __init__(self) -> None:
         """
+        Settings object, the command line arguments are parsed only when
+        load() is called or on the first access to any setting
+        """
+        self.__arguments = None
+
+    def load(self,
+             arguments: list = None) -> None:
+        """
         Parse command line arguments
+
+        :param arguments: list of arguments to parse, defaults to sys.argv
         """
         parser = argparse.ArgumentParser(
             prog=constants.APP_NAME,
@@ -66,7 +77,19 @@ class Settings(object):
                             dest='destination',
                             action='store',
                             default=constants.DESTINATION_OVPN_PROFILES_FOLDER,
-                            help='Directory where to store the results')
+                            help='Directory or file where to store the '
+                                 'results')
+        parser.add_argument('-f',
+                            '--format',
+                            type=str,
+                            dest='output_format',
+                            action='store',
+                            choices=(constants.OUTPUT_DIRECTORY,
+                                     constants.OUTPUT_ZIP,
+                                     constants.OUTPUT_TAR,
+                                     constants.OUTPUT_SQLITE),
+                            default=constants.OUTPUT_DIRECTORY,
+                            help='Format used to store the results')
         parser.add_argument('-m',
                             '--mode',
                             type=str,
@@ -93,6 +116,40 @@ class Settings(object):
                             dest='quiet',
                             action='store_true',
                             help='Quiet mode, no messages are shown')
+        parser.add_argument('-n',
+                            '--dry-run',
+                            dest='dry_run',
+                            action='store_true',
+                            help='Check the settings and exit without '
+                                 'scanning')
+        # Add arguments for diagnostics
+        parser_group = parser.add_argument_group('Diagnostic options')
+        parser_group.add_argument('--watchdog',
+                                  dest='watchdog',
+                                  action='store_true',
+                                  help='Measure the event loop lag and report '
+                                       'the callbacks blocking it')
+        parser_group.add_argument('--watchdog-threshold',
+                                  type=int,
+                                  dest='watchdog_threshold',
+                                  action='store',
+                                  default=constants.WATCHDOG_THRESHOLD,
+                                  help='Lag in milliseconds to report a '
+                                       'blocking callback')
+        parser_group.add_argument('--profile',
+                                  type=str,
+                                  dest='profile',
+                                  action='store',
+                                  help='Profile the scan and write the '
+                                       'results to PROFILE.collapsed and '
+                                       'PROFILE.txt')
+        parser_group.add_argument('--profile-interval',
+                                  type=float,
+                                  dest='profile_interval',
+                                  action='store',
+                                  default=constants.PROFILE_INTERVAL,
+                                  help='Interval in milliseconds between '
+                                       'each profiler sample')
         # Add arguments for downloads
         parser_group = parser.add_argument_group('Download options')
         parser_group.add_argument('-r',
@@ -102,6 +159,28 @@ class Settings(object):
                                   action='store',
                                   default=constants.RUNNING_TASKS,
                                   help='Running tasks in parallel')
+        parser_group.add_argument('--index-runners',
+                                  type=int,
+                                  dest='index_runners',
+                                  action='store',
+                                  default=0,
+                                  help='Maximum runners downloading the '
+                                       'index page at the same time')
+        parser_group.add_argument('--config-runners',
+                                  type=int,
+                                  dest='config_runners',
+                                  action='store',
+                                  default=0,
+                                  help='Maximum runners downloading '
+                                       'configuration pages at the same '
+                                       'time')
+        parser_group.add_argument('--profile-runners',
+                                  type=int,
+                                  dest='profile_runners',
+                                  action='store',
+                                  default=0,
+                                  help='Maximum runners downloading '
+                                       'profiles at the same time')
         parser_group.add_argument('-t',
                                   '--timeout',
                                   type=int,
@@ -122,8 +201,134 @@ class Settings(object):
                                   action='store',
                                   default=constants.DELAY_FOR_EACH_DOWNLOAD,
                                   help='Delay in seconds for each download')
+        # Add arguments for hosts filters
+        parser_group = parser.add_argument_group('Filter options')
+        parser_group.add_argument('--min-speed',
+                                  type=float,
+                                  dest='min_speed',
+                                  action='store',
+                                  default=0,
+                                  help='Minimum line speed in Mbps')
+        parser_group.add_argument('--max-ping',
+                                  type=int,
+                                  dest='max_ping',
+                                  action='store',
+                                  default=0,
+                                  help='Maximum ping time in milliseconds')
+        parser_group.add_argument('--min-score',
+                                  type=int,
+                                  dest='min_score',
+                                  action='store',
+                                  default=0,
+                                  help='Minimum quality score')
+        parser_group.add_argument('--top',
+                                  type=int,
+                                  dest='top',
+                                  action='store',
+                                  default=0,
+                                  help='Number of the hosts with the best '
+                                       'score to keep in the whole scan')
+        # Add arguments for generation mode
+        parser_group = parser.add_argument_group('Generation options')
+        parser_group.add_argument('--consolidate',
+                                  type=str,
+                                  dest='consolidate',
+                                  action='store',
+                                  choices=(constants.HOST_TYPE_FQDN,
+                                           constants.HOST_TYPE_IP),
+                                  help='Generate a single profile for each '
+                                       'country and protocol with many '
+                                       'remotes using the hostname or the '
+                                       'IP address')
+        parser_group.add_argument('--remotes',
+                                  type=int,
+                                  dest='remotes_per_profile',
+                                  action='store',
+                                  default=0,
+                                  help='Maximum number of remotes for each '
+                                       'consolidated profile')
+        parser_group.add_argument('--server-poll-timeout',
+                                  type=int,
+                                  dest='server_poll_timeout',
+                                  action='store',
+                                  default=constants.SERVER_POLL_TIMEOUT,
+                                  help='Timeout in seconds for each remote '
+                                       'in the consolidated profiles')
+        parser_group.add_argument('--probe',
+                                  dest='probe',
+                                  action='store_true',
+                                  help='Probe the endpoints and generate '
+                                       'the profiles only for the reachable '
+                                       'endpoints, sorted by latency')
+        parser_group.add_argument('--probe-timeout',
+                                  type=float,
+                                  dest='probe_timeout',
+                                  action='store',
+                                  default=constants.PROBE_TIMEOUT,
+                                  help='Timeout in seconds for each endpoint')
+        parser_group.add_argument('--probe-concurrency',
+                                  type=int,
+                                  dest='probe_concurrency',
+                                  action='store',
+                                  default=constants.PROBE_CONCURRENCY,
+                                  help='Endpoints probed at once')
+        parser_group.add_argument('--probe-top',
+                                  type=int,
+                                  dest='probe_top',
+                                  action='store',
+                                  default=0,
+                                  help='Number of the fastest endpoints to '
+                                       'keep')
+        # Add arguments for saved index pages
+        parser_group = parser.add_argument_group('Offline options')
+        parser_group.add_argument('--from-html',
+                                  type=str,
+                                  dest='from_html',
+                                  action='store',
+                                  nargs='+',
+                                  help='Files, directories or tar archives '
+                                       'with saved index pages to use '
+                                       'without any network access')
+        parser_group.add_argument('--workers',
+                                  type=int,
+                                  dest='workers',
+                                  action='store',
+                                  help='Processes used to parse the saved '
+                                       'index pages')
+        # Add arguments for daemon mode
+        parser_group = parser.add_argument_group('Daemon options')
+        parser_group.add_argument('--daemon',
+                                  dest='daemon',
+                                  action='store_true',
+                                  help='Keep running and scan periodically')
+        parser_group.add_argument('--interval',
+                                  type=int,
+                                  dest='interval',
+                                  action='store',
+                                  default=constants.DAEMON_INTERVAL,
+                                  help='Interval in seconds between scans')
+        parser_group.add_argument('--jitter',
+                                  type=int,
+                                  dest='jitter',
+                                  action='store',
+                                  default=constants.DAEMON_JITTER,
+                                  help='Maximum random seconds added to '
+                                       'the interval')
+        parser_group.add_argument('--status-file',
+                                  type=str,
+                                  dest='status_file',
+                                  action='store',
+                                  help='JSON file where to write the '
+                                       'latest scan statistics')
+        parser_group.add_argument('--proxy-failures',
+                                  type=int,
+                                  dest='proxy_failures',
+                                  action='store',
+                                  default=constants.DAEMON_PROXY_FAILURES,
+                                  help='Consecutive failures after which '
+                                       'a proxy is skipped')
         # Parse command line arguments
-        self.__arguments = parser.parse_args()
+        self.__arguments = parser.parse_args(arguments)
         # Fix verbose level
         if self.__arguments.quiet:
             # Set verbose level to 0
@@ -131,12 +336,64 @@ class Settings(object):
         elif self.__arguments.verbose_level is None:
             # Set verbose level to default value
             self.__arguments.verbose_level = constants.VERBOSE_LEVEL
+        # Check for hosts filters
+        if min(self.min_speed, self.max_ping, self.min_score, self.top) < 0:
+            parser.error('The hosts filters cannot be negative')
+        # Check for runners limits
+        if min(self.index_runners,
+               self.config_runners,
+               self.profile_runners) < 0:
+            parser.error('The runners limits cannot be negative')
+        # Check for consolidated profiles
+        if self.consolidate and not self.get_mode_generate():
+            parser.error('Consolidated profiles require generate mode')
+        if self.remotes_per_profile < 0:
+            parser.error('The number of remotes cannot be negative')
+        # Check for endpoints probing
+        if self.probe:
+            if not self.get_mode_generate():
+                parser.error('Probing the endpoints requires generate mode')
+            if self.probe_timeout <= 0 or self.probe_concurrency <= 0:
+                parser.error('The probe timeout and concurrency must be '
+                             'greater than zero')
+        if self.probe_top < 0:
+            parser.error('The number of probed endpoints to keep cannot be '
+                         'negative')
+        # Check for saved index pages
+        if self.from_html:
+            if not self.get_mode_generate():
+                parser.error('Saved index pages require generate mode')
+            for path in self.from_html:
+                if not os.path.exists(path):
+                    parser.error('The path "{PATH}" does not exist'.format(
+                        PATH=path))
+        if self.workers is not None and self.workers < 1:
+            parser.error('The workers must be at least one')
+        # Check for watchdog threshold
+        if self.watchdog_threshold <= 0:
+            parser.error('The watchdog threshold must be greater than zero')
+        # Check for profiler
+        if self.profile and self.daemon:
+            parser.error('The profiler cannot be used in daemon mode')
+        if self.profile_interval <= 0:
+            parser.error('The profiler interval must be greater than zero')
+        # Check for daemon interval
+        if self.interval <= 0:
+            parser.error('The interval must be greater than zero')
+        if self.jitter < 0 or self.proxy_failures < 0:
+            parser.error('The jitter and the proxy failures cannot be '
+                         'negative')
         # Check for missing destination folder
-        if not os.path.isdir(self.destination_path):
-            parser.error('The directory "{PATH}" does not exist'.format(
+        if self.output_format == constants.OUTPUT_DIRECTORY:
+            if not os.path.isdir(self.destination_path):
+                parser.error('The directory "{PATH}" does not exist'.format(
+                    PATH=self.destination_path))
+        elif not os.path.isdir(os.path.dirname(
+                os.path.abspath(self.destination_path))):
+            parser.error('The directory for "{PATH}" does not exist'.format(
                 PATH=self.destination_path))
         # Check for missing proxies list file
-        if not os.path.isfile(self.proxies):
+        if not self.from_html and not os.path.isfile(self.proxies):
             parser.error('The proxies file "{FILE}" does not exist'.format(
                 FILE=self.proxies))
         # Check for missing template file for generate mode
@@ -145,6 +402,17 @@ class Settings(object):
             parser.error('The template file "{FILE}" does not exist'.format(
                 FILE=self.openvpn_template))
 
+    @property
+    def arguments(self) -> argparse.Namespace:
+        """
+        Get the parsed arguments, parsing the command line if needed
+
+        :return: parsed arguments namespace
+        """
+        if self.__arguments is None:
+            self.load()
+        return self.__arguments
+
     @property
     def verbose_level(self) -> int:
         """
@@ -152,7 +420,7 @@ class Settings(object):
 
         :return: numeric verbose level
         """
-        return self.__arguments.verbose_level
+        return self.arguments.verbose_level
 
     @property
     def mode(self) -> str:
@@ -161,7 +429,7 @@ class Settings(object):
 
         :return: operational mode
         """
-        return self.__arguments.mode
+        return self.arguments.mode
 
     def get_mode_download(self) -> bool:
         """
@@ -186,7 +454,7 @@ class Settings(object):
 
         :return: URL of the requested page to download the hosts
         """
-        return self.__arguments.url
+        return self.arguments.url
 
     @property
     def openvpn_template(self) -> str:
@@ -195,7 +463,70 @@ class Settings(object):
 
         :return: template filename for profiles auto-generation
         """
-        return self.__arguments.openvpn_template
+        return self.arguments.openvpn_template
+
+    @property
+    def min_speed(self) -> float:
+        """
+        Get the minimum line speed
+
+        :return: speed in Mbps, 0 for any speed
+        """
+        return self.arguments.min_speed
+
+    @property
+    def max_ping(self) -> int:
+        """
+        Get the maximum ping time
+
+        :return: time in milliseconds, 0 for any ping
+        """
+        return self.arguments.max_ping
+
+    @property
+    def min_score(self) -> int:
+        """
+        Get the minimum quality score
+
+        :return: score, 0 for any score
+        """
+        return self.arguments.min_score
+
+    @property
+    def top(self) -> int:
+        """
+        Get the number of the hosts with the best score to keep
+
+        :return: hosts count, 0 for any host
+        """
+        return self.arguments.top
+
+    @property
+    def consolidate(self) -> str:
+        """
+        Get the host type for the consolidated profiles
+
+        :return: host type or None for a profile for each host
+        """
+        return self.arguments.consolidate
+
+    @property
+    def remotes_per_profile(self) -> int:
+        """
+        Get the maximum number of remotes for each consolidated profile
+
+        :return: remotes count, 0 for no limit
+        """
+        return self.arguments.remotes_per_profile
+
+    @property
+    def server_poll_timeout(self) -> int:
+        """
+        Get the number of seconds to wait for each remote
+
+        :return: time in seconds
+        """
+        return self.arguments.server_poll_timeout
 
     @property
     def destination_path(self) -> str:
@@ -204,7 +535,16 @@ class Settings(object):
 
         :return: path of the destination folder
         """
-        return self.__arguments.destination
+        return self.arguments.destination
+
+    @property
+    def output_format(self) -> str:
+        """
+        Get the output format
+
+        :return: format used to store the results
+        """
+        return self.arguments.output_format
 
     @property
     def proxies(self) -> str:
@@ -213,7 +553,7 @@ class Settings(object):
 
         :return: path of the proxies list file
         """
-        return self.__arguments.proxies
+        return self.arguments.proxies
 
     @property
     def country(self) -> str:
@@ -222,7 +562,7 @@ class Settings(object):
 
         :return: country to search in the contents
         """
-        return self.__arguments.country
+        return self.arguments.country
 
     @property
     def runners(self) -> int:
@@ -231,7 +571,34 @@ class Settings(object):
 
         :return: runners count
         """
-        return self.__arguments.runners
+        return self.arguments.runners
+
+    @property
+    def index_runners(self) -> int:
+        """
+        Get the maximum runners downloading the index page
+
+        :return: runners count, 0 for no limit
+        """
+        return self.arguments.index_runners
+
+    @property
+    def config_runners(self) -> int:
+        """
+        Get the maximum runners downloading the configuration pages
+
+        :return: runners count, 0 for no limit
+        """
+        return self.arguments.config_runners
+
+    @property
+    def profile_runners(self) -> int:
+        """
+        Get the maximum runners downloading the profiles
+
+        :return: runners count, 0 for no limit
+        """
+        return self.arguments.profile_runners
 
     @property
     def timeout(self) -> int:
@@ -240,7 +607,7 @@ class Settings(object):
 
         :return: time in seconds
         """
-        return self.__arguments.timeout
+        return self.arguments.timeout
 
     @property
     def delay_for_proxy(self) -> int:
@@ -249,7 +616,7 @@ class Settings(object):
 
         :return: time in seconds
         """
-        return self.__arguments.delay_proxy
+        return self.arguments.delay_proxy
 
     @property
     def delay_for_download(self) -> int:
@@ -258,4 +625,183 @@ class Settings(object):
 
         :return: time in seconds
         """
-        return self.__arguments.delay_download
+        return self.arguments.delay_download
+
+    @property
+    def dry_run(self) -> bool:
+        """
+        Get the dry run status
+
+        :return: boolean value for dry run mode
+        """
+        return self.arguments.dry_run
+
+    @property
+    def probe(self) -> bool:
+        """
+        Get the endpoints probing status
+
+        :return: boolean value for endpoints probing
+        """
+        return self.arguments.probe
+
+    @property
+    def probe_timeout(self) -> float:
+        """
+        Get the number of seconds to wait for each endpoint
+
+        :return: time in seconds
+        """
+        return self.arguments.probe_timeout
+
+    @property
+    def probe_concurrency(self) -> int:
+        """
+        Get the maximum number of endpoints probed at once
+
+        :return: endpoints count
+        """
+        return self.arguments.probe_concurrency
+
+    @property
+    def probe_top(self) -> int:
+        """
+        Get the number of the fastest endpoints to keep
+
+        :return: endpoints count, 0 for every reachable endpoint
+        """
+        return self.arguments.probe_top
+
+    @property
+    def from_html(self) -> list:
+        """
+        Get the saved index pages paths
+
+        :return: list of files, directories or tar archives paths
+        """
+        return self.arguments.from_html
+
+    @property
+    def workers(self) -> int:
+        """
+        Get the number of processes to parse the saved index pages
+
+        :return: processes count
+        """
+        return self.arguments.workers
+
+    @property
+    def watchdog(self) -> bool:
+        """
+        Get the event loop watchdog status
+
+        :return: boolean value for event loop watchdog
+        """
+        return self.arguments.watchdog
+
+    @property
+    def watchdog_threshold(self) -> int:
+        """
+        Get the lag to report a blocking callback
+
+        :return: time in milliseconds
+        """
+        return self.arguments.watchdog_threshold
+
+    @property
+    def profile(self) -> str:
+        """
+        Get the profiler results prefix
+
+        :return: path prefix for the profiler results, None to not profile
+        """
+        return self.arguments.profile
+
+    @property
+    def profile_interval(self) -> float:
+        """
+        Get the interval between each profiler sample
+
+        :return: time in milliseconds
+        """
+        return self.arguments.profile_interval
+
+    @property
+    def daemon(self) -> bool:
+        """
+        Get the daemon mode status
+
+        :return: boolean value for daemon mode
+        """
+        return self.arguments.daemon
+
+    @property
+    def interval(self) -> int:
+        """
+        Get the number of seconds between each scan in daemon mode
+
+        :return: time in seconds
+        """
+        return self.arguments.interval
+
+    @property
+    def jitter(self) -> int:
+        """
+        Get the maximum random seconds added to the interval
+
+        :return: time in seconds
+        """
+        return self.arguments.jitter
+
+    @property
+    def status_file(self) -> str:
+        """
+        Get the status filename for daemon mode
+
+        :return: path of the status file
+        """
+        return self.arguments.status_file
+
+    @property
+    def proxy_failures(self) -> int:
+        """
+        Get the consecutive failures after which a proxy is skipped
+
+        :return: failures count
+        """
+        return self.arguments.proxy_failures
+
+    def get_config(self) -> Config:
+        """
+        Get the options for a scan from the command line arguments
+
+        :return: Config object for the scan
+        """
+        return Config(url=self.url,
+                      proxies=self.proxies,
+                      country=self.country,
+                      destination_path=self.destination_path,
+                      output_format=self.output_format,
+                      mode=self.mode,
+                      openvpn_template=self.openvpn_template,
+                      min_speed=self.min_speed,
+                      max_ping=self.max_ping,
+                      min_score=self.min_score,
+                      top=self.top,
+                      consolidate=self.consolidate,
+                      remotes_per_profile=self.remotes_per_profile,
+                      server_poll_timeout=self.server_poll_timeout,
+                      probe=self.probe,
+                      probe_timeout=self.probe_timeout,
+                      probe_concurrency=self.probe_concurrency,
+                      probe_top=self.probe_top,
+                      from_html=self.from_html,
+                      workers=self.workers,
+                      verbose_level=self.verbose_level,
+                      runners=self.runners,
+                      index_runners=self.index_runners,
+                      config_runners=self.config_runners,
+                      profile_runners=self.profile_runners,
+                      timeout=self.timeout,
+                      delay_for_proxy=self.delay_for_proxy,
+                      delay_for_download=self.delay_for_download)
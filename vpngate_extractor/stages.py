@@ -0,0 +1,142 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import os.path
+import types
+
+# Pipeline stages
+STAGE_NETWORK = 'network'
+STAGE_PARSE = 'parse'
+STAGE_RENDER = 'render'
+STAGE_WRITE = 'write'
+STAGE_CONSUMER = 'consumer'
+STAGE_IDLE = 'idle'
+STAGE_OTHER = 'other'
+
+# (Module filename, function name) -> stage, None matches any function
+STAGES = {
+    ('proxy_request.py', 'open'): STAGE_NETWORK,
+    ('proxy_request.py', '__get'): STAGE_NETWORK,
+    ('index_parser.py', None): STAGE_PARSE,
+    ('html_snapshots.py', 'parse_snapshot'): STAGE_PARSE,
+    ('openvpn_profile.py', 'render'): STAGE_RENDER,
+    ('openvpn_profile.py', 'render_remotes'): STAGE_RENDER,
+    ('openvpn_profile.py', 'create'): STAGE_WRITE,
+    ('output_backend.py', None): STAGE_WRITE,
+    ('manifest.py', None): STAGE_WRITE,
+    ('consumer_request.py', None): STAGE_CONSUMER,
+}
+# Modules with an unknown function -> stage
+STAGES_MODULES = {
+    'ssl.py': STAGE_NETWORK,
+    'sslproto.py': STAGE_NETWORK,
+    'streams.py': STAGE_NETWORK,
+    'selector_events.py': STAGE_NETWORK,
+}
+# Packages -> stage
+STAGES_PACKAGES = {
+    'aiohttp': STAGE_NETWORK,
+    'yarl': STAGE_NETWORK,
+    'multidict': STAGE_NETWORK,
+    'bs4': STAGE_PARSE,
+}
+# Functions where the event loop waits for new events
+IDLE_FUNCTIONS = {
+    ('selectors.py', 'select'),
+    ('base_events.py', '_run_once'),
+}
+
+
+def get_stage(frame: types.FrameType) -> str:
+    """
+    Get the pipeline stage for a stack, looking for the innermost frame of
+    a known stage
+
+    :param frame: innermost frame of the stack
+    :return: stage name
+    """
+    innermost_frame = frame
+    innermost = True
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        if innermost and (filename, code.co_name) in IDLE_FUNCTIONS:
+            return STAGE_IDLE
+        innermost = False
+        stage = (STAGES.get((filename, code.co_name)) or
+                 STAGES.get((filename, None)))
+        if stage:
+            return stage
+        frame = frame.f_back
+    # No application stage found, look for the libraries
+    frame = innermost_frame
+    while frame is not None:
+        stage = get_library_stage(frame.f_code.co_filename)
+        if stage:
+            return stage
+        frame = frame.f_back
+    return STAGE_OTHER
+
+
+def get_library_stage(filepath: str) -> str:
+    """
+    Get the pipeline stage for a library module
+
+    :param filepath: path of the module
+    :return: stage name, None for unknown modules
+    """
+    stage = STAGES_MODULES.get(os.path.basename(filepath))
+    if stage:
+        return stage
+    for (package, stage) in STAGES_PACKAGES.items():
+        if '{SEP}{PACKAGE}{SEP}'.format(SEP=os.sep,
+                                        PACKAGE=package) in filepath:
+            return stage
+    return None
+
+
+def get_frame_name(frame: types.FrameType) -> str:
+    """
+    Get a short name for a frame
+
+    :param frame: stack frame
+    :return: function name with module filename and line number
+    """
+    code = frame.f_code
+    return '{FUNCTION} ({FILENAME}:{LINE})'.format(
+        FUNCTION=getattr(code, 'co_qualname', code.co_name),
+        FILENAME=os.path.basename(code.co_filename),
+        LINE=frame.f_lineno)
+
+
+def get_stack(frame: types.FrameType) -> list:
+    """
+    Get the names of the frames in a stack
+
+    :param frame: innermost frame of the stack
+    :return: list of the frame names, the outermost first
+    """
+    stack = []
+    while frame is not None:
+        stack.append(get_frame_name(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
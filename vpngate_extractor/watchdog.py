@@ -0,0 +1,198 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import sys
+import threading
+import time
+
+from .stages import get_frame_name, get_stack, get_stage
+
+
+class LoopWatchdog(object):
+    def __init__(self,
+                 interval: float = 0.05,
+                 threshold: float = 0.1) -> None:
+        """
+        LoopWatchdog object to measure the event loop lag and to report
+        the callbacks blocking the loop. A task wakes up every interval to
+        measure the lag, while a thread captures the stack of the loop
+        when the task doesn't wake up in time
+
+        :param interval: seconds between each lag measurement
+        :param threshold: seconds of lag to report a slow callback
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.__loop = None
+        self.__loop_thread_id = None
+        self.__task = None
+        self.__thread = None
+        self.__running = False
+        self.__lock = threading.Lock()
+        self.__last_beat = 0.0
+        # Stack captured for the current blocking callback
+        self.__pending = None
+        # Lag statistics
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        # (Stage, task, innermost frame) -> [count, total, max, stack]
+        self.slow_callbacks = {}
+
+    def start(self) -> None:
+        """
+        Start the watchdog in the running event loop
+        """
+        self.__loop = asyncio.get_running_loop()
+        self.__loop_thread_id = threading.get_ident()
+        self.__running = True
+        self.__last_beat = time.monotonic()
+        self.__task = self.__loop.create_task(self.__heartbeat())
+        self.__task.set_name('watchdog')
+        self.__thread = threading.Thread(target=self.__monitor,
+                                         name='watchdog',
+                                         daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the watchdog
+        """
+        self.__running = False
+        if self.__task:
+            self.__task.cancel()
+            self.__task = None
+        if self.__thread:
+            self.__thread.join()
+            self.__thread = None
+
+    async def __heartbeat(self) -> None:
+        """
+        Measure the delay between the expected and the actual wake up
+        """
+        while self.__running:
+            starting_time = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - starting_time - self.interval)
+            with self.__lock:
+                self.__last_beat = now
+                self.samples += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                if self.__pending and lag >= self.threshold:
+                    self.__record(lag, *self.__pending)
+                self.__pending = None
+
+    def __monitor(self) -> None:
+        """
+        Capture the stack of the event loop thread when it's blocked
+        """
+        while self.__running:
+            time.sleep(self.interval / 2)
+            with self.__lock:
+                blocked = time.monotonic() - self.__last_beat
+                if (self.__pending is None and
+                        blocked >= self.threshold + self.interval):
+                    frame = sys._current_frames().get(self.__loop_thread_id)
+                    if frame is not None:
+                        task = asyncio.current_task(self.__loop)
+                        self.__pending = (
+                            get_stage(frame),
+                            task.get_name() if task else None,
+                            get_frame_name(frame),
+                            get_stack(frame))
+
+    def __record(self,
+                 lag: float,
+                 stage: str,
+                 task_name: str,
+                 frame_name: str,
+                 stack: list) -> None:
+        """
+        Record a slow callback
+
+        :param lag: seconds of lag caused by the callback
+        :param stage: pipeline stage of the callback
+        :param task_name: name of the running task
+        :param frame_name: name of the innermost frame
+        :param stack: list of the frame names
+        """
+        key = (stage, task_name, frame_name)
+        record = self.slow_callbacks.setdefault(key, [0, 0.0, 0.0, stack])
+        record[0] += 1
+        record[1] += lag
+        record[2] = max(record[2], lag)
+
+    def get_summary(self) -> dict:
+        """
+        Get the event loop lag statistics and the slow callbacks
+
+        :return: dictionary with the statistics
+        """
+        with self.__lock:
+            return {
+                'samples': self.samples,
+                'mean_lag': (self.total_lag / self.samples
+                             if self.samples else 0.0),
+                'max_lag': self.max_lag,
+                'slow_callbacks': [
+                    {'stage': stage,
+                     'task': task_name,
+                     'location': frame_name,
+                     'count': count,
+                     'total': total,
+                     'max': maximum,
+                     'stack': stack}
+                    for ((stage, task_name, frame_name),
+                         (count, total, maximum, stack))
+                    in sorted(self.slow_callbacks.items(),
+                              key=lambda item: item[1][1],
+                              reverse=True)]}
+
+    def print_summary(self,
+                      limit: int = 10) -> None:
+        """
+        Print the event loop lag statistics and the slowest callbacks
+
+        :param limit: maximum number of slow callbacks to print
+        """
+        summary = self.get_summary()
+        print('Event loop lag: {MEAN:.1f} ms mean, {MAX:.1f} ms max '
+              'over {SAMPLES} samples'.format(MEAN=summary['mean_lag'] * 1000,
+                                              MAX=summary['max_lag'] * 1000,
+                                              SAMPLES=summary['samples']))
+        if not summary['slow_callbacks']:
+            print('No slow callbacks found')
+            return
+        print('Slow callbacks blocking the event loop:')
+        for callback in summary['slow_callbacks'][:limit]:
+            print('  {COUNT} x {STAGE} in task {TASK}, {TOTAL:.1f} ms total, '
+                  '{MAX:.1f} ms max: {LOCATION}'.format(
+                        COUNT=callback['count'],
+                        STAGE=callback['stage'],
+                        TASK=callback['task'],
+                        TOTAL=callback['total'] * 1000,
+                        MAX=callback['max'] * 1000,
+                        LOCATION=callback['location']))
+            for frame_name in callback['stack'][-5:]:
+                print('      {FRAME}'.format(FRAME=frame_name))
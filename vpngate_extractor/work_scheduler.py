@@ -0,0 +1,205 @@
+##
+#     Project: VPNGate Extractor
+# Description: Extract OpenVPN hosts from vpngate.com
+#      Author: Fabio Castelli (Muflone) <muflone@muflone.com>
+#   Copyright: 2019 Fabio Castelli
+#     License: GPL-3+
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <https://www.gnu.org/licenses/>.
+##
+
+
+import asyncio
+import collections
+
+
+# Lanes for the work types, in the order of their priority
+LANE_PROFILE = 'profile'
+LANE_CONFIG = 'config'
+LANE_INDEX = 'index'
+
+
+class WorkLane(object):
+    def __init__(self,
+                 scheduler: 'WorkScheduler',
+                 name: str,
+                 priority: int,
+                 limit: int = 0,
+                 maxsize: int = 0) -> None:
+        """
+        WorkLane object with the pending items for a work type
+
+        :param scheduler: WorkScheduler object which owns the lane
+        :param name: name of the lane
+        :param priority: priority of the lane, lower values come first
+        :param limit: maximum items processed at the same time, 0 for
+                      no limit
+        :param maxsize: maximum pending items before put waits, 0 for
+                        no limit
+        """
+        self.scheduler = scheduler
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.active = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def is_available(self) -> bool:
+        """
+        Check if the lane has an item which can be processed now
+
+        :return: boolean value for available item
+        """
+        return bool(self.items) and (not self.limit or
+                                     self.active < self.limit)
+
+    def is_full(self) -> bool:
+        """
+        Check if the lane cannot accept more pending items
+
+        :return: boolean value for full lane
+        """
+        return bool(self.maxsize) and len(self.items) >= self.maxsize
+
+    async def put(self,
+                  item: object) -> None:
+        """
+        Add an item to the lane, waiting for a free place if the lane
+        is full
+
+        :param item: item to add
+        """
+        await self.scheduler.put(self.name, item)
+
+
+class WorkScheduler(object):
+    def __init__(self) -> None:
+        """
+        WorkScheduler object to share the runners between several lanes
+        of work, each runner takes the next item from the lane with the
+        highest priority which has not reached its limit
+        """
+        self.__lanes = {}
+        self.__lock = asyncio.Lock()
+        # Runners waiting for work and producers waiting for free places
+        self.__work = asyncio.Condition(self.__lock)
+        self.__space = asyncio.Condition(self.__lock)
+        self.__closed = False
+
+    def add_lane(self,
+                 name: str,
+                 priority: int,
+                 limit: int = 0,
+                 maxsize: int = 0) -> WorkLane:
+        """
+        Add a new lane
+
+        :param name: name of the lane
+        :param priority: priority of the lane, lower values come first
+        :param limit: maximum items processed at the same time, 0 for
+                      no limit
+        :param maxsize: maximum pending items before put waits, 0 for
+                        no limit
+        :return: the new WorkLane object
+        """
+        lane = WorkLane(scheduler=self,
+                        name=name,
+                        priority=priority,
+                        limit=limit,
+                        maxsize=maxsize)
+        self.__lanes[name] = lane
+        # Keep the lanes ordered by their priority
+        self.__lanes = dict(sorted(self.__lanes.items(),
+                                   key=lambda item: item[1].priority))
+        return lane
+
+    def get_lane(self,
+                 name: str) -> WorkLane:
+        """
+        Get a lane by its name
+
+        :param name: name of the lane
+        :return: WorkLane object
+        """
+        return self.__lanes[name]
+
+    def __is_finished(self) -> bool:
+        return self.__closed and not any(lane.items or lane.active
+                                         for lane in self.__lanes.values())
+
+    async def put(self,
+                  name: str,
+                  item: object) -> None:
+        """
+        Add an item to a lane, waiting for a free place if the lane is full,
+        the runners add the work found only to the lanes without maxsize
+
+        :param name: name of the lane
+        :param item: item to add
+        """
+        lane = self.__lanes[name]
+        async with self.__lock:
+            while lane.is_full():
+                await self.__space.wait()
+            lane.items.append(item)
+            self.__work.notify()
+
+    async def close(self) -> None:
+        """
+        Close the scheduler, no more items will be added from outside the
+        runners and get returns None when every lane is done
+        """
+        async with self.__lock:
+            self.__closed = True
+            self.__work.notify_all()
+
+    async def get(self) -> tuple:
+        """
+        Get the next item to process, from the lane with the highest
+        priority which has an available item
+
+        :return: tuple with the lane name and the item, None when every
+                 lane is done and the scheduler is closed
+        """
+        async with self.__lock:
+            while True:
+                for lane in self.__lanes.values():
+                    if lane.is_available():
+                        lane.active += 1
+                        item = lane.items.popleft()
+                        self.__space.notify()
+                        return lane.name, item
+                if self.__is_finished():
+                    self.__work.notify_all()
+                    return None
+                await self.__work.wait()
+
+    async def done(self,
+                   name: str) -> None:
+        """
+        Mark an item as processed
+
+        :param name: name of the lane of the processed item
+        """
+        async with self.__lock:
+            lane = self.__lanes[name]
+            lane.active -= 1
+            # Other items in the lane could be available now
+            if self.__is_finished():
+                self.__work.notify_all()
+            else:
+                self.__work.notify()